@@ -1,14 +1,28 @@
 import os
+import threading
+
+import click
 
 from flask import Flask, render_template, redirect, session, g, flash, url_for, request
+from flask import Response, abort, jsonify, stream_with_context
 from flask_debugtoolbar import DebugToolbarExtension
 from flask_bcrypt import bcrypt, check_password_hash
 from flask_migrate import Migrate
 from sqlalchemy.exc import IntegrityError
 
 from models import db, connect_db, User, Launch, Collection, Launch_Collection, SQLAlchemy
+from models import recount, refresh_leaderboard, leaderboard, PURGE_THRESHOLD
 from forms import RegisterUserForm, CollectionForm, LaunchForm, ProfileForm, LoginForm
-from helpers import previous_launches, all_launches, get_launch, launch_search
+from helpers import previous_launches, all_launches, get_launch, launch_search, launch_upcoming_url
+from helpers import snapshot_launches, sync_launches, suggest_launches
+from snapshot import launch_snapshot, write_snapshot
+from stats import launch_stats
+from exports import EXPORTS
+import recommendations
+import feed
+from routing import read_only, replica_binds, reset_routing, stick_to_primary
+from microcache import microcache
+from upstream import UpstreamBusy
 
 CURR_USER_KEY = "curr_user"
 
@@ -17,6 +31,7 @@ migrate = Migrate(app, db)
 
 app.config['SQLALCHEMY_DATABASE_URI'] = (
     os.environ.get('DATABASE_URL', 'postgresql:///launch_tracker'))
+app.config['SQLALCHEMY_BINDS'] = replica_binds()
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = True
 app.config['SQLALCHEMY_ECHO'] = False
 app.config['DEBUG_TB_INTERCEPT_REDIRECTS'] = False
@@ -24,6 +39,8 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', "It's a secret")
 toolbar = DebugToolbarExtension(app)
 
 connect_db(app)
+app.before_request(reset_routing)
+app.after_request(stick_to_primary)
 
 
 ######################################## Login Setup ###################################################
@@ -33,7 +50,7 @@ def add_user_to_g():
     """If we're logged in, add curr user to Flask global."""
 
     if CURR_USER_KEY in session:
-        g.user = User.query.get(session[CURR_USER_KEY])
+        g.user = User.query.filter_by(id=session[CURR_USER_KEY], active=True).first()
 
     else:
         g.user = None
@@ -58,6 +75,26 @@ def inject_getattr():
     return dict(getattr=getattr)
 
 
+@app.template_global()
+def launch_url(launch):
+    """Link to a stored launch's page.
+
+    Launches saved before uuids were kept have none until they're synced or
+    collected again, so they link to a search for their name instead.
+    """
+
+    if launch.uuid:
+        return url_for('view_launch', launch_id=launch.uuid)
+    return url_for('search_launches', q=launch.name)
+
+
+@app.errorhandler(UpstreamBusy)
+def upstream_busy(e):
+    """Launch Library quota is exhausted; ask the user to retry."""
+
+    return "Launch data is busy, please try again shortly.", 503
+
+
 #################################  Register/login/logout routes ############################################# 
 
 @app.route('/login', methods=['GET','POST'])
@@ -128,6 +165,7 @@ def register():
 
 
 @app.route('/user/index')
+@read_only
 def list_users():
     """Lists all users.
 
@@ -145,6 +183,7 @@ def list_users():
 
 
 @app.route('/user/profile/<int:user_id>')
+@read_only
 def view_user(user_id):
     """View a user's profile."""
 
@@ -208,11 +247,25 @@ def delete_user():
 
     do_logout()
 
-    db.session.delete(g.user)
-    db.session.commit()
+    if g.user.collected_count() > PURGE_THRESHOLD:
+        # Too big to delete in one transaction: hide the account now and
+        # purge it in batches in the background.
+        g.user.active = False
+        db.session.commit()
+        threading.Thread(target=purge_user, args=(g.user.id,), daemon=True).start()
+    else:
+        User.delete(g.user)
+        db.session.commit()
 
     return redirect("/register")
 
+
+def purge_user(user_id):
+    """Background batched delete of a deactivated user."""
+
+    with app.app_context():
+        User.purge(user_id)
+
 #################################### Collection Routes ####################################
 
 @app.route('/collection/new', methods=["GET", "POST"])
@@ -246,15 +299,22 @@ def collections_new():
 
 
 @app.route('/collection/user/<int:user_id>')
+@read_only
 def all_collections(user_id):
     """Shows all of a user's collections"""
 
     user = User.query.get_or_404(user_id)
+    collections = (Collection
+                .query
+                .filter(Collection.createdBy == user_id)
+                .order_by(Collection.createdDate.desc())
+                .all())
 
-    return render_template('collection/all.html', user=user)
+    return render_template('collection/all.html', user=user, collections=collections)
 
 
 @app.route('/collection/<int:collection_id>')
+@read_only
 def collection_show(collection_id):
     """Show a collection."""
 
@@ -271,6 +331,23 @@ def collection_show(collection_id):
     return render_template('collection/view.html', collection=collection, user=user, launches=launches)
 
 
+@app.route('/collection/<int:collection_id>/export.<fmt>')
+@read_only
+def collection_export(collection_id, fmt):
+    """Stream a collection's launches as CSV, NDJSON or iCalendar."""
+
+    if fmt not in EXPORTS:
+        abort(404)
+
+    collection = Collection.query.get_or_404(collection_id)
+    mimetype, exporter = EXPORTS[fmt]
+
+    return Response(
+        stream_with_context(exporter(collection)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="collection-{collection_id}.{fmt}"'})
+
+
 @app.route('/collection/edit/<int:collection_id>', methods=["GET", "POST"])
 def collection_edit(collection_id):
     """Edit a collection."""
@@ -316,7 +393,9 @@ def collection_delete(collection_id):
         flash("Access unauthorized.", "danger")
         return redirect("/")
 
-    Collection.query.filter_by(id=collection_id).delete()
+    collection = Collection.delete(collection_id)
+    if collection is not None:
+        feed.rebuild_user(collection.createdBy)
 
     db.session.commit()
 
@@ -336,6 +415,10 @@ def search_launches():
     if not search_term:
         flash("")
         return redirect('/launch/index')
+    
+    snapshot = launch_snapshot.current()
+    if snapshot is not None:
+        searched_launches, pagination = snapshot_launches(snapshot, url, search_term)
     else:
         searched_launches, pagination = launch_search(url, search_term)
 
@@ -350,13 +433,33 @@ def search_launches():
                                collections=collections)
     
 
+@app.route('/launch/suggest')
+def suggest():
+    """Autocomplete suggestions for the launch search box, as JSON."""
+
+    suggestions = []
+    for match in suggest_launches(request.args.get('q', '')):
+        if match['type'] == 'launch':
+            url = url_for('view_launch', launch_id=match['uuid'])
+        else:
+            url = url_for('search_launches', q=match['label'])
+        suggestions.append({'label': match['label'], 'type': match['type'], 'url': url})
+
+    return jsonify(suggestions=suggestions)
+
+
 @app.route('/launch/index')
+@microcache(ttl=5)
 def show_all_launches():
     """Displays all launches"""
     
     url = request.args.get('url')
-    launches, pagination = all_launches(url)
-    collections = Collection.query.filter_by(createdBy=g.user.id).all()
+    snapshot = launch_snapshot.current()
+    if snapshot is not None:
+        launches, pagination = snapshot_launches(snapshot, url)
+    else:
+        launches, pagination = all_launches(url)
+    collections = Collection.query.filter_by(createdBy=g.user.id).all() if g.user else []
 
     return render_template('launch/index.html', 
                            launches=launches, 
@@ -365,44 +468,90 @@ def show_all_launches():
                            collections=collections)
 
 
-@app.route('/launch/<launch_name>')
-def view_launch(launch_name):
+@app.route('/launch/leaderboard')
+@read_only
+def launch_leaderboard():
+    """Most-collected launches, as of the last leaderboard refresh."""
+
+    return render_template('launch/leaderboard.html', leaders=leaderboard())
+
+
+@app.route('/launch/stats')
+@read_only
+def launch_statistics():
+    """Launch statistics over the mirrored launch data."""
+
+    stats = launch_stats.current()
+    providers, months, provider_counts = stats.provider_months()
+    pads, orbits, orbit_shares = stats.pad_orbits()
+
+    return render_template('launch/stats.html',
+                           providers=providers,
+                           months=months,
+                           provider_counts=provider_counts,
+                           rockets=stats.rocket_outcomes(),
+                           pads=pads,
+                           orbits=orbits,
+                           orbit_shares=orbit_shares)
+
+
+@app.route('/launch/<uuid:launch_id>')
+def view_launch(launch_id):
     """View a launch"""
 
-    launch_data = get_launch(launch_name)
+    launch_data = get_launch(str(launch_id))
+    if not launch_data:
+        abort(404)
+
     collections = Collection.query.filter_by(createdBy=g.user.id).all()
 
-    return render_template('launch/view.html', launch_data=launch_data, collections=collections)
+    stored_launch = Launch.query.filter_by(uuid=str(launch_id)).first()
+    similar = recommendations.neighbors(stored_launch.id) if stored_launch else []
+
+    return render_template('launch/view.html', 
+                           launch_data=launch_data, 
+                           collections=collections, 
+                           similar=similar)
 
 
-@app.route('/launch/collect/<launch_name>/<int:collection_id>', methods=['POST'])
-def collect_launch(launch_name, collection_id):
+@app.route('/launch/collect/<uuid:launch_id>/<int:collection_id>', methods=['POST'])
+def collect_launch(launch_id, collection_id):
     """Adds a launch to a collection"""
 
     if not g.user:
         flash("Access unauthorized.", "danger")
         return redirect("/")
     
-    launch = get_launch(launch_name)
-    existing_launch = Launch.query.filter_by(name=launch[0]['Name']).first()
+    existing_launch = Launch.query.filter_by(uuid=str(launch_id)).first()
 
     if not existing_launch:
-        new_launch = Launch(launch)
-        db.session.add(new_launch)
-        db.session.commit()
-        launch_id = new_launch.id
-    else:
-        launch_id = existing_launch.id
-    
+        # Usually a cache hit: the user is collecting a launch they just viewed.
+        launch = get_launch(str(launch_id))
+        if not launch:
+            flash("Launch not found.", "danger")
+            return redirect(url_for('show_all_launches'))
+
+        # Launches stored before uuids were kept are matched by name and backfilled.
+        existing_launch = Launch.stored([launch]).get(launch[0]['ID'])
+        if existing_launch:
+            existing_launch.update_from(launch)
+        else:
+            existing_launch = Launch(launch)
+            db.session.add(existing_launch)
+
     try:
+        db.session.commit()
+        db_launch_id = existing_launch.id
+
         existing_launch_collection = Launch_Collection.query.filter_by(
-            collectionID=collection_id, launchID=launch_id).first()
+            collectionID=collection_id, launchID=db_launch_id).first()
 
         if existing_launch_collection:
             flash("Launch already exists in this collection", "danger")
         else:
-            launch_collection = Launch_Collection(collectionID=collection_id, launchID=launch_id)
-            db.session.add(launch_collection)
+            Launch_Collection.collect(collection_id, db_launch_id)
+            recommendations.record_collect(collection_id, db_launch_id)
+            feed.record_collect(collection_id, db_launch_id)
             db.session.commit()
             flash("Launch successfully added to the collection", "success")
     except IntegrityError as e:
@@ -410,7 +559,7 @@ def collect_launch(launch_name, collection_id):
         flash("An error occurred. Please try again later", "danger")
         print("IntegrityError: ", e)
 
-    return redirect(url_for('view_launch', launch_name=launch_name))
+    return redirect(url_for('view_launch', launch_id=launch_id))
 
 
 @app.route('/launch/uncollect/<int:launch_id>/<int:collection_id>')
@@ -428,7 +577,9 @@ def uncollect(launch_id, collection_id):
             ).first()
         
         if launch_collection:
-            db.session.delete(launch_collection)
+            Launch_Collection.uncollect(launch_collection)
+            recommendations.record_uncollect(collection_id, launch_id)
+            feed.record_uncollect(collection_id, launch_id)
             db.session.commit()
             flash("Launch uncollection successful!", "success")
         else:
@@ -444,20 +595,93 @@ def uncollect(launch_id, collection_id):
 #################################### Homepage ##########################################
 
 @app.route('/')
+@microcache(ttl=5)
 def homepage():
     """Show homepage:
         Displays all launches.
-        If logged in, displays additional user information.
+        If logged in, displays the user's precomputed upcoming launch feed instead.
     """
 
-    launches = all_launches()
-
-    # Display all launches. 
-    # Future addition: customize launches/favorites/collections if authenticated.
+    # The feed is stored ahead of time (see feed.py): one indexed read, no upstream call.
     if g.user:
 
-        return render_template('home.html', launches=launches, current_user=g.user)
+        return render_template('home.html', feed=feed.user_feed(g.user.id), current_user=g.user)
     
-    # Display all launches, without future logged-in user personalization.
+    # Display all launches, without logged-in user personalization.
     else:
-        return render_template('home-anon.html', launches=launches, current_user=g.user)
\ No newline at end of file
+        return render_template('home-anon.html', launches=all_launches(), current_user=g.user)
+
+
+
+#################################### CLI ##########################################
+
+@app.cli.command('refresh-leaderboard')
+def refresh_leaderboard_command():
+    """Refresh the most-collected launches view. Run periodically (e.g. from cron)."""
+
+    refresh_leaderboard()
+
+
+@app.cli.command('recount')
+def recount_command():
+    """Rebuild the collection/launch counters from scratch."""
+
+    recount()
+    refresh_leaderboard()
+
+
+@app.cli.command('build-recommendations')
+def build_recommendations_command():
+    """Rebuild every launch's "collectors also collected" list from scratch."""
+
+    print(f"Built recommendations for {recommendations.build()} launches")
+
+
+@app.cli.command('purge-users')
+def purge_users_command():
+    """Finish deleting any deactivated accounts, e.g. after a restart interrupted a purge."""
+
+    for user_id, in db.session.query(User.id).filter_by(active=False).all():
+        User.purge(user_id)
+        print(f"Purged user #{user_id}")
+
+
+@app.cli.command('sync-launches')
+def sync_launches_command():
+    """Mirror every Launch Library launch into the launches table."""
+
+    print(f"Synced {len(sync_launches())} launches")
+
+
+@app.cli.command('refresh-upcoming')
+def refresh_upcoming_command():
+    """Sync the upcoming launches and rescore the feeds they appear in."""
+
+    launch_ids = sync_launches(launch_upcoming_url)
+    feed.rescore_launches(launch_ids)
+    db.session.commit()
+    print(f"Refreshed {len(launch_ids)} upcoming launches")
+
+
+@app.cli.command('rebuild-feeds')
+def rebuild_feeds_command():
+    """Rebuild every user's interests and upcoming launch feed from scratch."""
+
+    print(f"Rebuilt feeds for {feed.rebuild_all()} users")
+
+
+@app.cli.command('export-snapshot')
+@click.argument('path', required=False)
+def export_snapshot_command(path):
+    """Write the launches table to a memory-mappable snapshot file.
+
+    Defaults to $LAUNCH_SNAPSHOT. The file is replaced atomically, so web
+    workers pick it up on their next check without a restart.
+    """
+
+    path = path or launch_snapshot.path
+    if not path:
+        raise click.UsageError("Pass a path or set LAUNCH_SNAPSHOT")
+
+    rows = write_snapshot(path, Launch.query.yield_per(1000))
+    print(f"Wrote {rows} launches to {path}")
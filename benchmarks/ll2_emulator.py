@@ -0,0 +1,263 @@
+"""Offline Launch Library 2 emulator for load testing.
+
+Implements the /2.2.0/launch endpoints the app uses (list, search, detail
+and upcoming) over a generated dataset:
+
+    python benchmarks/ll2_emulator.py --launches 100000 --port 8001
+    LL2_BASE_URL=http://localhost:8001/2.2.0 flask run
+
+Supported query parameters: `ordering` (net, -net, name, -name,
+last_updated), `limit`/`offset` pagination with next/previous links,
+`search` (name, rocket, provider, pad location), `name` (case-insensitive
+contains) and `net__gt`, `net__gte`, `net__lt`, `net__lte`.
+
+Faults are injectable: `--latency-ms`/`--jitter-ms` delay every response,
+`--error-rate` answers that fraction of requests with 429, and `--quota`
+rate limits to that many requests per second (429 + Retry-After beyond it).
+"""
+
+import argparse
+import bisect
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
+
+from flask import Flask, abort, jsonify, request
+
+PROVIDERS = [
+    ('SpaceX', 'Commercial'), ('Rocket Lab', 'Commercial'), ('Roscosmos', 'Government'),
+    ('China Aerospace Science and Technology Corporation', 'Government'),
+    ('Arianespace', 'Commercial'), ('United Launch Alliance', 'Commercial'),
+    ('Indian Space Research Organization', 'Government'),
+    ('Japan Aerospace Exploration Agency', 'Government'), ('Blue Origin', 'Commercial'),
+]
+ROCKETS = [
+    ('Falcon 9', 'Block 5'), ('Falcon Heavy', ''), ('Electron', ''), ('Soyuz 2.1', 'b'),
+    ('Long March 2', 'D'), ('Ariane 5', 'ECA'), ('Atlas V', '551'), ('PSLV', 'XL'),
+    ('H-IIA', '202'), ('New Glenn', ''), ('Vulcan', 'VC2S'),
+]
+PADS = [
+    ('Space Launch Complex 40', 'Cape Canaveral, FL, USA'),
+    ('Space Launch Complex 4E', 'Vandenberg SFB, CA, USA'),
+    ('Rocket Lab Launch Complex 1A', 'Onenui Station, Mahia Peninsula, New Zealand'),
+    ('31/6', 'Baikonur Cosmodrome, Republic of Kazakhstan'),
+    ('LC-43/94', 'Jiuquan, People\'s Republic of China'),
+    ('ELA-3', 'Kourou, French Guiana'),
+    ('First Launch Pad', 'Satish Dhawan Space Centre, India'),
+    ('Yoshinobu Launch Complex', 'Tanegashima, Japan'),
+]
+MISSIONS = ['Starlink Group', 'OneWeb', 'Transporter', 'CRS', 'Crew', 'GPS III', 'Yaogan',
+            'Kuiper', 'Beidou', 'Gaofen', 'NROL', 'Sentinel']
+MISSION_TYPES = ['Communications', 'Earth Science', 'Navigation', 'Resupply',
+                 'Human Exploration', 'Government/Top Secret']
+ORBITS = ['Low Earth Orbit', 'Geostationary Transfer Orbit', 'Sun-Synchronous Orbit',
+          'Medium Earth Orbit', 'Polar Orbit']
+PAST_STATUSES = ['Launch Successful'] * 18 + ['Launch Failure', 'Partial Failure']
+FUTURE_STATUSES = ['Go for Launch', 'To Be Determined', 'To Be Confirmed']
+
+ORDERINGS = {'net': 'net', 'name': 'name', 'last_updated': 'last_updated'}
+
+
+class Dataset:
+    """Synthetic launches stored as compact rows; JSON is built per response."""
+
+    def __init__(self, count, seed=0):
+        rng = random.Random(seed)
+        now = datetime.now(timezone.utc)
+        start = datetime(1957, 10, 4, tzinfo=timezone.utc)
+        span = (now + timedelta(days=365) - start).total_seconds()
+
+        self.rows = []
+        for i in range(count):
+            net = start + timedelta(seconds=rng.random() * span)
+            rocket = rng.randrange(len(ROCKETS))
+            statuses = FUTURE_STATUSES if net > now else PAST_STATUSES
+            self.rows.append({
+                'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                'name': f"{ROCKETS[rocket][0]} {ROCKETS[rocket][1]} | "
+                        f"{rng.choice(MISSIONS)} {i}".replace('  ', ' '),
+                'net': net.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'last_updated': (min(net, now) - timedelta(hours=rng.randrange(0, 720)))
+                                .strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'status': rng.choice(statuses),
+                'provider': rng.randrange(len(PROVIDERS)),
+                'rocket': rocket,
+                'mission_type': rng.randrange(len(MISSION_TYPES)),
+                'orbit': rng.randrange(len(ORBITS)),
+                'pad': rng.randrange(len(PADS)),
+            })
+
+        self.by_id = {row['id']: row for row in self.rows}
+        self.order = {field: sorted(self.rows, key=lambda row: row[field])
+                      for field in ORDERINGS.values()}
+        self.nets = [row['net'] for row in self.order['net']]
+        for row in self.rows:
+            row['haystack'] = ' '.join((
+                row['name'], ROCKETS[row['rocket']][0], PROVIDERS[row['provider']][0],
+                PADS[row['pad']][1])).lower()
+
+    def launch_json(self, row):
+        provider = PROVIDERS[row['provider']]
+        rocket = ROCKETS[row['rocket']]
+        pad = PADS[row['pad']]
+        return {
+            'id': row['id'],
+            'url': f"{request.host_url}2.2.0/launch/{row['id']}/",
+            'name': row['name'],
+            'last_updated': row['last_updated'],
+            'net': row['net'],
+            'image': f"https://example.invalid/images/{row['id']}.jpg",
+            'status': {'name': row['status']},
+            'launch_service_provider': {'name': provider[0], 'type': provider[1]},
+            'rocket': {'configuration': {'name': rocket[0], 'variant': rocket[1]}},
+            'mission': {
+                'name': row['name'].split(' | ')[-1],
+                'description': f"Synthetic {MISSION_TYPES[row['mission_type']].lower()} mission.",
+                'type': MISSION_TYPES[row['mission_type']],
+                'orbit': {'name': ORBITS[row['orbit']]},
+            },
+            'pad': {
+                'name': pad[0],
+                'wiki_url': '',
+                'map_url': '',
+                'map_image': '',
+                'location': {'name': pad[1]},
+            },
+        }
+
+    def query(self, args, upcoming=False):
+        ordering = args.get('ordering', 'net')
+        field = ORDERINGS.get(ordering.lstrip('-'), 'net')
+        rows = self.order[field]
+
+        # net filters narrow the (already net-ordered) list with bisect.
+        lo, hi = 0, len(self.nets)
+        bounds = {
+            'net__gt': lambda v: bisect.bisect_right(self.nets, v),
+            'net__gte': lambda v: bisect.bisect_left(self.nets, v),
+            'net__lt': lambda v: bisect.bisect_left(self.nets, v),
+            'net__lte': lambda v: bisect.bisect_right(self.nets, v),
+        }
+        lower = [('net__gt', args.get('net__gt')), ('net__gte', args.get('net__gte'))]
+        upper = [('net__lt', args.get('net__lt')), ('net__lte', args.get('net__lte'))]
+        if upcoming:
+            lower.append(('net__gte', datetime.now(timezone.utc).isoformat()))
+        for key, value in lower:
+            if value:
+                lo = max(lo, bounds[key](_iso(value)))
+        for key, value in upper:
+            if value:
+                hi = min(hi, bounds[key](_iso(value)))
+        if (lo, hi) != (0, len(self.nets)):
+            if field == 'net':
+                rows = rows[lo:hi]
+            else:
+                allowed = {row['id'] for row in self.order['net'][lo:hi]}
+                rows = [row for row in rows if row['id'] in allowed]
+
+        search = (args.get('search') or '').lower()
+        if search:
+            rows = [row for row in rows if search in row['haystack']]
+        name = (args.get('name') or '').lower()
+        if name:
+            rows = [row for row in rows if name in row['name'].lower()]
+
+        if ordering.startswith('-'):
+            rows = rows[::-1]
+        return rows
+
+
+def _iso(value):
+    """Normalizes an ISO timestamp to the dataset's 'YYYY-MM-DDTHH:MM:SSZ' form."""
+
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def create_app(launches=10000, seed=0, latency_ms=0, jitter_ms=0, error_rate=0.0, quota=0):
+    app = Flask(__name__)
+    dataset = Dataset(launches, seed)
+    quota_lock = threading.Lock()
+    window = {'second': 0, 'used': 0}
+
+    @app.before_request
+    def inject_faults():
+        if latency_ms or jitter_ms:
+            time.sleep(max(0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000)
+
+        if error_rate and random.random() < error_rate:
+            return too_many_requests(1)
+
+        if quota:
+            with quota_lock:
+                second = int(time.time())
+                if window['second'] != second:
+                    window.update(second=second, used=0)
+                window['used'] += 1
+                over = window['used'] > quota
+            if over:
+                return too_many_requests(1)
+
+    def too_many_requests(retry_after):
+        response = jsonify(detail="Request was throttled.")
+        response.status_code = 429
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+
+    def page(rows):
+        limit = min(int(request.args.get('limit', 10)), 100)
+        offset = int(request.args.get('offset', 0))
+
+        def link(new_offset):
+            args = request.args.to_dict()
+            args.update(limit=limit, offset=new_offset)
+            return f"{request.base_url}?{urlencode(args)}"
+
+        return jsonify(
+            count=len(rows),
+            next=link(offset + limit) if offset + limit < len(rows) else None,
+            previous=link(max(offset - limit, 0)) if offset > 0 else None,
+            results=[dataset.launch_json(row) for row in rows[offset:offset + limit]])
+
+    @app.route('/2.2.0/launch/', strict_slashes=False)
+    def launch_list():
+        return page(dataset.query(request.args))
+
+    @app.route('/2.2.0/launch/upcoming/', strict_slashes=False)
+    def launch_upcoming():
+        return page(dataset.query(request.args, upcoming=True))
+
+    @app.route('/2.2.0/launch/<launch_id>/', strict_slashes=False)
+    def launch_detail(launch_id):
+        row = dataset.by_id.get(launch_id)
+        if row is None:
+            abort(404)
+        return jsonify(dataset.launch_json(row))
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--launches', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered 429')
+    parser.add_argument('--quota', type=int, default=0, help='requests per second before 429 (0 = unlimited)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    args = parser.parse_args()
+
+    app = create_app(args.launches, args.seed, args.latency_ms, args.jitter_ms,
+                     args.error_rate, args.quota)
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Load test the Launch Tracker against the Launch Library 2 emulator.
+
+    python benchmarks/ll2_emulator.py --launches 100000 --latency-ms 80 &
+    LL2_BASE_URL=http://localhost:8001/2.2.0 flask run --port 5000 &
+    python benchmarks/loadtest.py --duration 60 --concurrency 32 \\
+        --username loadtester --password secret123
+
+Each worker thread picks a weighted random route, requests it and records
+the latency. Routes that need an account are only exercised when
+--username/--password are given. At the end it prints throughput and
+latency percentiles per route.
+"""
+
+import argparse
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+CSRF = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+SEARCH_TERMS = ['falcon', 'starlink', 'electron', 'soyuz', 'crew', 'kuiper', 'ariane', 'gps']
+
+# (route label, weight, needs login, path builder)
+ROUTES = [
+    ('/', 20, False, lambda ctx: '/'),
+    ('/launch/index', 20, False, lambda ctx: '/launch/index'),
+    ('/launch/suggest', 20, False,
+     lambda ctx: f"/launch/suggest?q={random.choice(SEARCH_TERMS)[:random.randint(1, 5)]}"),
+    ('/launch/leaderboard', 5, False, lambda ctx: '/launch/leaderboard'),
+    ('/launch/stats', 5, False, lambda ctx: '/launch/stats'),
+    ('/launch/<uuid>', 20, True, lambda ctx: f"/launch/{random.choice(ctx['launch_ids'])}"),
+    ('/launch/search', 10, True, lambda ctx: f"/launch/search?q={random.choice(SEARCH_TERMS)}"),
+]
+
+
+def login(http, base_url, username, password):
+    form = http.get(f"{base_url}/login")
+    token = CSRF.search(form.text)
+    http.post(f"{base_url}/login", data={
+        'csrf_token': token.group(1) if token else '',
+        'username': username,
+        'email': 'loadtest@example.com',
+        'password': password,
+    })
+
+
+def launch_ids(emulator_url, count=200):
+    res = requests.get(f"{emulator_url}/launch/", params={'limit': 100, 'ordering': '-net'})
+    ids = [launch['id'] for launch in res.json()['results']]
+    while len(ids) < count and res.json()['next']:
+        res = requests.get(res.json()['next'])
+        ids += [launch['id'] for launch in res.json()['results']]
+    return ids
+
+
+def worker(args, ctx, routes, deadline, results, lock):
+    http = requests.Session()
+    if args.username:
+        login(http, args.base_url, args.username, args.password)
+
+    labels = [route[0] for route in routes]
+    weights = [route[1] for route in routes]
+    builders = {route[0]: route[3] for route in routes}
+
+    while time.monotonic() < deadline:
+        label = random.choices(labels, weights)[0]
+        started = time.perf_counter()
+        try:
+            res = http.get(args.base_url + builders[label](ctx), timeout=30, allow_redirects=False)
+            ok = res.status_code < 400
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            results[label].append((elapsed, ok))
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+def report(results, duration):
+    print(f"{'route':<22}{'reqs':>8}{'errors':>8}{'req/s':>9}"
+          f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    total = 0
+    for label in sorted(results):
+        samples = results[label]
+        timings = sorted(elapsed for elapsed, _ in samples)
+        errors = sum(1 for _, ok in samples if not ok)
+        total += len(samples)
+        print(f"{label:<22}{len(samples):>8}{errors:>8}{len(samples) / duration:>9.1f}"
+              + ''.join(f"{percentile(timings, p) * 1000:>9.1f}" for p in (50, 90, 99))
+              + f"{timings[-1] * 1000:>9.1f}")
+    print(f"\n{total} requests in {duration:.0f}s: {total / duration:.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--emulator-url', default='http://localhost:8001/2.2.0')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--username')
+    parser.add_argument('--password')
+    args = parser.parse_args()
+
+    routes = [route for route in ROUTES if args.username or not route[2]]
+    ctx = {'launch_ids': launch_ids(args.emulator_url) if args.username else []}
+
+    results = defaultdict(list)
+    lock = threading.Lock()
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = [threading.Thread(target=worker, args=(args, ctx, routes, deadline, results, lock))
+               for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report(results, time.monotonic() - started)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Memory and latency benchmark for the autocomplete prefix index.
+
+    python benchmarks/suggest_bench.py [launches] [lookups]
+
+Builds a PrefixIndex over a synthetic launch dataset and reports build time,
+memory held by the index, and lookup latency percentiles for random prefixes.
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from suggest import PrefixIndex  # noqa: E402
+
+ROCKETS = ['Falcon 9 Block 5', 'Falcon Heavy', 'Electron', 'Soyuz 2.1b', 'Long March 2D',
+           'Ariane 5 ECA', 'Atlas V 551', 'PSLV-XL', 'H-IIA 202', 'New Glenn', 'Vulcan VC2S']
+PROVIDERS = ['SpaceX', 'Rocket Lab', 'Roscosmos', 'CASC', 'Arianespace',
+             'United Launch Alliance', 'ISRO', 'JAXA', 'Blue Origin']
+PADS = ['Cape Canaveral, FL, USA', 'Vandenberg SFB, CA, USA', 'Onenui Station, Mahia Peninsula, New Zealand',
+        'Baikonur Cosmodrome, Republic of Kazakhstan', 'Jiuquan, People\'s Republic of China',
+        'Kourou, French Guiana', 'Satish Dhawan Space Centre, India', 'Tanegashima, Japan']
+MISSIONS = ['Starlink Group', 'OneWeb', 'Transporter', 'CRS', 'Crew', 'GPS III', 'Yaogan',
+            'Kuiper', 'Beidou', 'Gaofen', 'NROL', 'Sentinel']
+
+
+def synthetic_launches(count):
+    launches = {}
+    for i in range(count):
+        rocket = random.choice(ROCKETS)
+        launches[str(uuid.uuid4())] = {
+            'name': f"{rocket} | {random.choice(MISSIONS)} {i % 500}-{i // 500}",
+            'rocket_name': rocket,
+            'organization': random.choice(PROVIDERS),
+            'pad_location_name': random.choice(PADS),
+        }
+    return launches
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+def main(count=10000, lookups=20000):
+    launches = synthetic_launches(count)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    index = PrefixIndex()
+    index.update(launches)
+    build = time.perf_counter() - started
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    words = [word.lower() for launch in launches.values()
+             for word in launch['name'].split() if word.isalnum()]
+    prefixes = [random.choice(words)[:random.randint(1, 6)] for _ in range(lookups)]
+
+    timings = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        index.lookup(prefix)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+
+    changed = dict(list(synthetic_launches(100).items()))
+    started = time.perf_counter()
+    index.update(changed)
+    incremental = time.perf_counter() - started
+
+    print(f"launches:           {count}")
+    print(f"index keys:         {len(index)}")
+    print(f"index memory:       {memory / 2**20:.1f} MiB")
+    print(f"full build:         {build * 1000:.0f} ms")
+    print(f"100-launch update:  {incremental * 1000:.1f} ms")
+    for p in (50, 90, 99, 99.9):
+        print(f"lookup p{p:<5}       {percentile(timings, p) * 1e6:.0f} us")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
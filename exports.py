@@ -0,0 +1,121 @@
+"""Streamed collection exports.
+
+Each exporter is a generator over a server-side cursor (`yield_per`), so a
+collection of any size is written with constant memory and the first rows
+go out before the query has finished.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+from models import Launch, Launch_Collection
+
+BATCH_SIZE = 500
+
+FIELDS = (
+    'uuid', 'name', 'launch_date', 'status', 'organization', 'organization_type',
+    'rocket_name', 'rocket_variant', 'mission_name', 'mission_type', 'mission_orbit',
+    'mission_description', 'pad_name', 'pad_location_name', 'img_url',
+)
+
+
+def collection_launches(collection_id):
+    """A collection's launches, in the order they were collected, streamed in batches."""
+
+    return (Launch.query
+            .join(Launch_Collection, Launch_Collection.launchID == Launch.id)
+            .filter(Launch_Collection.collectionID == collection_id)
+            .order_by(Launch_Collection.id)
+            .yield_per(BATCH_SIZE))
+
+
+def export_csv(collection):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow(FIELDS)
+    yield flush()
+    for launch in collection_launches(collection.id):
+        writer.writerow([getattr(launch, field) or '' for field in FIELDS])
+        yield flush()
+
+
+def export_ndjson(collection):
+    for launch in collection_launches(collection.id):
+        yield json.dumps({field: getattr(launch, field) for field in FIELDS}) + '\n'
+
+
+def _ics_text(value):
+    return (str(value or '')
+            .replace('\\', '\\\\')
+            .replace(';', '\\;')
+            .replace(',', '\\,')
+            .replace('\n', '\\n'))
+
+
+def _ics_line(line):
+    """Folds a content line to 75 octets, per RFC 5545."""
+
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(encoded))
+        # Don't split a multi-byte character.
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _ics_time(launch_date):
+    """Launch Library's ISO `net` ('2024-01-01T12:00:00Z') as an iCalendar UTC time."""
+
+    try:
+        moment = datetime.fromisoformat(launch_date.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    return moment.strftime('%Y%m%dT%H%M%SZ')
+
+
+def export_ics(collection):
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+    yield (_ics_line('BEGIN:VCALENDAR')
+           + _ics_line('VERSION:2.0')
+           + _ics_line('PRODID:-//The Launch Tracker//Collection Export//EN')
+           + _ics_line(f'X-WR-CALNAME:{_ics_text(collection.name)}'))
+
+    for launch in collection_launches(collection.id):
+        start = _ics_time(launch.launch_date)
+        if start is None:
+            continue
+        yield (_ics_line('BEGIN:VEVENT')
+               + _ics_line(f'UID:{launch.uuid or launch.id}@launch-tracker')
+               + _ics_line(f'DTSTAMP:{stamp}')
+               + _ics_line(f'DTSTART:{start}')
+               + _ics_line(f'SUMMARY:{_ics_text(launch.name)}')
+               + _ics_line(f'LOCATION:{_ics_text(launch.pad_location_name)}')
+               + _ics_line(f'DESCRIPTION:{_ics_text(launch.mission_description)}')
+               + _ics_line('END:VEVENT'))
+
+    yield _ics_line('END:VCALENDAR')
+
+
+EXPORTS = {
+    'csv': ('text/csv', export_csv),
+    'ndjson': ('application/x-ndjson', export_ndjson),
+    'ics': ('text/calendar', export_ics),
+}
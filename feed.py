@@ -0,0 +1,205 @@
+"""Personalized "upcoming launches you care about" feed.
+
+A user's interests are the providers, rockets and pad locations of the
+launches in their collections, weighted by how many collected launches share
+each one. Their feed is the FEED_SIZE best-scoring upcoming launches, where a
+launch scores the summed weight of the interests it matches.
+
+Both are stored. Collecting and uncollecting adjust the user's interests and
+rescore their feed; refreshing the upcoming launches (`flask
+refresh-upcoming`) rescores only the launches that changed, for only the
+users interested in them. The logged-in homepage reads the stored rows.
+"""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import joinedload
+
+from models import db, Feed_Item
+
+FEED_SIZE = 50
+
+# Interest kind, and the launches column it is matched against.
+INTEREST_COLUMNS = (
+    ('provider', 'organization'),
+    ('rocket', 'rocket_name'),
+    ('pad', 'pad_location_name'),
+)
+
+# Every (user, upcoming launch, weight) match for one kind of interest.
+MATCH_SQL = """
+    SELECT i.user_id, l.id AS launch_id, l.launch_date, i.weight
+    FROM user_interests i
+    JOIN launches l ON l.{column} = i.value
+    WHERE i.kind = '{kind}' AND l.launch_date >= :now AND {where}"""
+
+# A user's interests of one kind, counted from their collections.
+INTERESTS_SQL = """
+    INSERT INTO user_interests (user_id, kind, value, weight)
+    SELECT c."createdBy", '{kind}', l.{column}, count(*)
+    FROM collections c
+    JOIN launch_collections lc ON lc."collectionID" = c.id
+    JOIN launches l ON l.id = lc."launchID"
+    WHERE l.{column} IS NOT NULL AND {where}
+    GROUP BY c."createdBy", l.{column}"""
+
+# Trims each listed user's feed back to its FEED_SIZE best entries.
+TRIM_SQL = """
+    DELETE FROM feed_items f
+    USING (SELECT user_id, launch_id,
+                  row_number() OVER (PARTITION BY user_id
+                                     ORDER BY score DESC, launch_date, launch_id) AS rank
+           FROM feed_items
+           WHERE {where}) ranked
+    WHERE f.user_id = ranked.user_id
+      AND f.launch_id = ranked.launch_id
+      AND ranked.rank > :size"""
+
+
+def _now():
+    """The current time in Launch Library's 'net' format, which sorts as text."""
+
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _scores_sql(where):
+    matches = ' UNION ALL '.join(
+        MATCH_SQL.format(column=column, kind=kind, where=where) for kind, column in INTEREST_COLUMNS)
+    return f"""
+        SELECT m.user_id, m.launch_id, m.launch_date, sum(m.weight) AS score
+        FROM ({matches}) m
+        GROUP BY m.user_id, m.launch_id, m.launch_date"""
+
+
+def user_feed(user_id, limit=20):
+    """The user's stored feed, best match first, skipping launches that have flown."""
+
+    return (Feed_Item.query
+            .options(joinedload(Feed_Item.launch))
+            .filter(Feed_Item.user_id == user_id, Feed_Item.launch_date >= _now())
+            .order_by(Feed_Item.score.desc(), Feed_Item.launch_date)
+            .limit(limit)
+            .all())
+
+
+######################### Collection changes ############################
+
+def record_collect(collection_id, launch_id):
+    """Adds the launch's provider, rocket and pad to its collector's interests."""
+
+    _adjust_interests(collection_id, launch_id, 1)
+
+
+def record_uncollect(collection_id, launch_id):
+    """Takes the launch's provider, rocket and pad back out of its collector's interests."""
+
+    _adjust_interests(collection_id, launch_id, -1)
+
+
+def _adjust_interests(collection_id, launch_id, delta):
+    params = {'collection_id': collection_id, 'launch_id': launch_id, 'delta': delta}
+    values = ', '.join(f"('{kind}', l.{column})" for kind, column in INTEREST_COLUMNS)
+
+    user_id = db.session.execute(text(f"""
+        INSERT INTO user_interests (user_id, kind, value, weight)
+        SELECT c."createdBy", v.kind, v.value, :delta
+        FROM collections c
+        JOIN launches l ON l.id = :launch_id
+        CROSS JOIN LATERAL (VALUES {values}) AS v(kind, value)
+        WHERE c.id = :collection_id AND v.value IS NOT NULL
+        ON CONFLICT (user_id, kind, value)
+        DO UPDATE SET weight = user_interests.weight + EXCLUDED.weight
+        RETURNING user_id"""), params).scalar()
+
+    if user_id is not None:
+        db.session.execute(text(
+            "DELETE FROM user_interests WHERE user_id = :user_id AND weight <= 0"),
+            {'user_id': user_id})
+        rescore_user(user_id)
+
+
+def rebuild_user(user_id):
+    """Recomputes a user's interests from their collections, then their feed.
+
+    Used when whole collections go away, where adjusting launch by launch
+    would cost a statement per launch.
+    """
+
+    params = {'user_id': user_id}
+    db.session.execute(text("DELETE FROM user_interests WHERE user_id = :user_id"), params)
+    _count_interests('c."createdBy" = :user_id', params)
+
+    rescore_user(user_id)
+
+
+def _count_interests(where, params=None):
+    for kind, column in INTEREST_COLUMNS:
+        db.session.execute(text(INTERESTS_SQL.format(kind=kind, column=column, where=where)), params)
+
+
+def rescore_user(user_id, size=FEED_SIZE):
+    """Replaces a user's feed with their best-scoring upcoming launches."""
+
+    params = {'user_id': user_id, 'now': _now(), 'size': size}
+    db.session.execute(text("DELETE FROM feed_items WHERE user_id = :user_id"), params)
+    db.session.execute(text(f"""
+        INSERT INTO feed_items (user_id, launch_id, launch_date, score)
+        SELECT user_id, launch_id, launch_date, score
+        FROM ({_scores_sql('i.user_id = :user_id')}) scored
+        ORDER BY score DESC, launch_date, launch_id
+        LIMIT :size"""), params)
+
+
+######################### Upcoming launch changes ############################
+
+def rescore_launches(launch_ids, size=FEED_SIZE):
+    """Rescores `launch_ids` in the feed of every user interested in them.
+
+    Launches that moved into the past or stopped matching drop out of feeds.
+    A feed that loses entries this way is topped up by the user's next
+    collect or by `flask rebuild-feeds`.
+    """
+
+    if not launch_ids:
+        return
+
+    params = {'launch_ids': list(launch_ids), 'now': _now(), 'size': size}
+
+    def statement(sql):
+        return text(sql).bindparams(bindparam('launch_ids', expanding=True))
+
+    affected = [user_id for user_id, in db.session.execute(statement(
+        "DELETE FROM feed_items WHERE launch_id IN :launch_ids RETURNING user_id"), params)]
+    affected += [user_id for user_id, in db.session.execute(statement(f"""
+        INSERT INTO feed_items (user_id, launch_id, launch_date, score)
+        SELECT user_id, launch_id, launch_date, score
+        FROM ({_scores_sql('l.id IN :launch_ids')}) scored
+        RETURNING user_id"""), params)]
+
+    if affected:
+        db.session.execute(
+            text(TRIM_SQL.format(where='user_id IN :user_ids'))
+            .bindparams(bindparam('user_ids', expanding=True)),
+            {'user_ids': sorted(set(affected)), 'size': size})
+
+
+def rebuild_all(size=FEED_SIZE):
+    """Recomputes every user's interests and feed from scratch."""
+
+    params = {'now': _now(), 'size': size}
+    db.session.execute(text("DELETE FROM user_interests"))
+    _count_interests('TRUE')
+
+    db.session.execute(text("DELETE FROM feed_items"))
+    db.session.execute(text(f"""
+        INSERT INTO feed_items (user_id, launch_id, launch_date, score)
+        SELECT user_id, launch_id, launch_date, score
+        FROM (SELECT scored.*,
+                     row_number() OVER (PARTITION BY user_id
+                                        ORDER BY score DESC, launch_date, launch_id) AS rank
+              FROM ({_scores_sql('TRUE')}) scored) ranked
+        WHERE rank <= :size"""), params)
+
+    db.session.commit()
+    return db.session.query(Feed_Item.user_id).distinct().count()
@@ -1,21 +1,39 @@
-import requests
+import os
+import threading
+import time
 from datetime import datetime, timedelta
-from models import Launch
+from models import db, Launch
+from snapshot import launch_snapshot
+from suggest import PrefixIndex
+from upstream import gateway, TTLCache, INTERACTIVE, BACKGROUND
 
-launch_base_url = "https://lldev.thespacedevs.com/2.2.0/launch"
-launch_upcoming_url = "https://lldev.thespacedevs.com/2.2.0/launch/upcoming/"
+# Point LL2_BASE_URL at benchmarks/ll2_emulator.py to run without the live API.
+api_base_url = os.environ.get('LL2_BASE_URL', "https://lldev.thespacedevs.com/2.2.0").rstrip('/')
+launch_base_url = f"{api_base_url}/launch"
+launch_upcoming_url = f"{api_base_url}/launch/upcoming/"
 
+# Details a user just viewed, so collecting them doesn't go back upstream.
+launch_detail_cache = TTLCache(ttl=15 * 60)
 
-def all_launches(url=None):
+# Autocomplete over launch names, rockets, providers and pads.
+launch_suggestions = PrefixIndex()
+SUGGEST_REFRESH_SECONDS = 30
+_suggest_lock = threading.Lock()
+_suggest_source = {'checked': 0, 'snapshot': None, 'max_synced': None}
+
+
+def all_launches(url=None, priority=INTERACTIVE):
     if url is None:
         url = launch_base_url
-    res = requests.get(
+    data = gateway.get(
         url,
         params={
             'ordering' : 'net'
-        }
+        },
+        priority=priority
     )
-    data = res.json()
+    if data is None:
+        return [], {'count' : 0, 'next' : None, 'previous' : None}
 
     launches = []
     for launch in data['results']:
@@ -41,47 +59,120 @@ def all_launches(url=None):
 
 
 
-def get_launch(launch_name):
-    res = requests.get(
-        launch_base_url,
+def parse_launch(launch):
+    """Splits a Launch Library launch into launch/rocket/mission/pad sections."""
+
+    launch_info = {
+        'ID': launch['id'],
+        'Name': launch['name'],
+        'Last_Updated' : launch['last_updated'],
+        'Launch_Date': launch['net'],
+        'Img_URL': launch['image'],
+        'Status' : launch['status']['name'],
+        'Organization' : launch['launch_service_provider']['name'],
+        'Organization_Type' : launch['launch_service_provider']['type']
+    }
+    rocket_info = {
+        'Rocket_Name' : launch['rocket']['configuration']['name'],
+        'Rocket_Variant' : launch['rocket']['configuration']['variant']
+    }
+    mission_info = {
+        'Mission_Name' : launch['mission']['name'],
+        'Mission_Description' : launch['mission']['description'],
+        'Mission_Type' : launch['mission']['type'],
+        'Mission_Orbit' : launch['mission']['orbit']['name']
+    }
+    pad_info = {
+        'Pad_Name' : launch['pad']['name'],
+        'Pad_Wiki_URL' : launch['pad']['wiki_url'],
+        'Pad_Map_URL' : launch['pad']['map_url'],
+        'Pad_Location_Name' : launch['pad']['location']['name'],
+        'Pad_Map_Img' : launch['pad']['map_image'],
+    }
+    return [launch_info, rocket_info, mission_info, pad_info]
+
+
+
+def sections_from_fields(fields):
+    """Rebuilds get_launch's sections from a dict of Launch column values."""
+
+    return [
+        {
+            'ID': fields['uuid'],
+            'Name': fields['name'],
+            'Last_Updated' : fields['last_updated'],
+            'Launch_Date': fields['launch_date'],
+            'Img_URL': fields['img_url'],
+            'Status' : fields['status'],
+            'Organization' : fields['organization'],
+            'Organization_Type' : fields['organization_type']
+        },
+        {
+            'Rocket_Name' : fields['rocket_name'],
+            'Rocket_Variant' : fields['rocket_variant']
+        },
+        {
+            'Mission_Name' : fields['mission_name'],
+            'Mission_Description' : fields['mission_description'],
+            'Mission_Type' : fields['mission_type'],
+            'Mission_Orbit' : fields['mission_orbit']
+        },
+        {
+            'Pad_Name' : fields['pad_name'],
+            'Pad_Wiki_URL' : fields['pad_wiki_url'],
+            'Pad_Map_URL' : fields['pad_map_url'],
+            'Pad_Location_Name' : fields['pad_location_name'],
+            'Pad_Map_Img' : fields['pad_map_img'],
+        },
+    ]
+
+
+
+def listing_from_fields(fields):
+    """The launch index's summary dict, from a dict of Launch column values."""
+
+    return {
+        'id' : fields['uuid'],
+        'date' : fields['launch_date'],
+        'name' : fields['name'],
+        'status' : fields['status'],
+        'description' : fields['mission_description'],
+        'img_url' : fields['img_url'],
+        'organization' : fields['organization'],
+        'organization_type' : fields['organization_type'],
+        'location' : fields['pad_location_name']
+    }
+
+
+
+def get_launch(launch_id, priority=INTERACTIVE):
+    """Launch detail by upstream UUID.
+
+    Served from the detail cache or the launch snapshot when possible.
+    """
+
+    launch_data = launch_detail_cache.get(launch_id)
+    if launch_data is not None:
+        return launch_data
+
+    snapshot = launch_snapshot.current()
+    if snapshot is not None:
+        fields = snapshot.by_uuid(launch_id)
+        if fields is not None:
+            return sections_from_fields(fields)
+
+    data = gateway.get(
+        f"{launch_base_url}/{launch_id}/",
         params={
-            'launch' : '/2.2.0/launch/',
-            'mode' : 'normal',
-            'name' : launch_name
-        }
+            'mode' : 'normal'
+        },
+        priority=priority
     )
-    data = res.json()
-    launch_data = []
-    for launch in data['results']:
-        launch_info = {
-            'Name': launch['name'],
-            'Last_Updated' : launch['last_updated'],
-            'Launch_Date': launch['net'],
-            'Img_URL': launch['image'],
-            'Status' : launch['status']['name']
-        }
-        rocket_info = {
-            'Rocket_Name' : launch['rocket']['configuration']['name'],
-            'Rocket_Variant' : launch['rocket']['configuration']['variant']
-        }
-        mission_info = {
-            'Mission_Name' : launch['mission']['name'],
-            'Mission_Description' : launch['mission']['description'],
-            'Mission_Type' : launch['mission']['type'],
-            'Mission_Orbit' : launch['mission']['orbit']['name']
-        }
-        pad_info = {
-            'Pad_Name' : launch['pad']['name'],
-            'Pad_Wiki_URL' : launch['pad']['wiki_url'],
-            'Pad_Map_URL' : launch['pad']['map_url'],
-            'Pad_Location_Name' : launch['pad']['location']['name'],
-            'Pad_Map_Img' : launch['pad']['map_image'],
-        }
-        launch_data.append(launch_info)
-        launch_data.append(rocket_info)
-        launch_data.append(mission_info)
-        launch_data.append(pad_info)
+    if data is None:
+        return []
 
+    launch_data = parse_launch(data)
+    launch_detail_cache.set(launch_id, launch_data)
     return launch_data
 
 
@@ -89,9 +180,9 @@ def get_launch(launch_name):
 def previous_launches(start_time, end_time, next_url=None):
 
     if next_url:
-        res = requests.get(next_url)
+        data = gateway.get(next_url, priority=BACKGROUND)
     else:
-        res = requests.get(
+        data = gateway.get(
             launch_base_url, 
             params={
                 'net__get' : start_time.isoformat(), 
@@ -99,10 +190,12 @@ def previous_launches(start_time, end_time, next_url=None):
                 'mode' : 'detailed',
                 'limit': 5,
                 'ordering' : 'net'
-                }
+                },
+            priority=BACKGROUND
             )
-    data = res.json()
     launches = []
+    if data is None:
+        return launches, None
     for launch in data['results']:
         launch_info = {
             'name': launch['name'],
@@ -119,17 +212,16 @@ def previous_launches(start_time, end_time, next_url=None):
 def launch_search(url, search_term):
     if url is None:
         url = launch_base_url
-    res = requests.get(
+    data = gateway.get(
         url,
         params={
             'ordering' : 'net',
             'search' : search_term
         }
     )
-    data = res.json()
 
-    if data['count'] == 0:
-        return None
+    if data is None:
+        return None, None
     else:
         searched_launches = []
         for launch in data['results']:
@@ -152,3 +244,120 @@ def launch_search(url, search_term):
             'previous' : data['previous']
         }   
         return searched_launches, pagination
+
+
+
+SNAPSHOT_PAGE_SIZE = 10
+
+
+def snapshot_launches(snapshot, cursor=None, search_term=None):
+    """all_launches / launch_search served from a launch snapshot.
+
+    `cursor` is the row offset carried in the pagination links.
+    """
+
+    offset = int(cursor) if cursor and str(cursor).isdigit() else 0
+
+    if search_term:
+        rows = snapshot.search(search_term)
+        count = len(rows)
+        if count == 0:
+            return None, None
+        page = [snapshot.row(i) for i in rows[offset:offset + SNAPSHOT_PAGE_SIZE]]
+    else:
+        count = len(snapshot)
+        page = snapshot.page(offset, SNAPSHOT_PAGE_SIZE)
+
+    pagination = {
+        'count' : count,
+        'next' : offset + SNAPSHOT_PAGE_SIZE if offset + SNAPSHOT_PAGE_SIZE < count else None,
+        'previous' : max(offset - SNAPSHOT_PAGE_SIZE, 0) if offset > 0 else None
+    }
+    return [listing_from_fields(fields) for fields in page], pagination
+
+
+
+def sync_launches(url=launch_base_url, limit=100):
+    """Mirrors every launch at `url` from Launch Library into the launches table.
+
+    Runs at background priority so page views keep their share of the quota.
+    Returns the ids of the launches written.
+    """
+
+    params = {
+        'mode' : 'normal',
+        'limit' : limit,
+        'ordering' : 'net'
+    }
+    synced = []
+    while url:
+        data = gateway.get(url, params=params, priority=BACKGROUND)
+        if data is None:
+            break
+
+        sections = [parse_launch(launch) for launch in data['results']]
+        existing = Launch.stored(sections)
+        written = []
+        for launch in sections:
+            if launch[0]['ID'] in existing:
+                existing[launch[0]['ID']].update_from(launch)
+                written.append(existing[launch[0]['ID']])
+            else:
+                written.append(Launch(launch))
+                db.session.add(written[-1])
+        db.session.flush()
+        synced += [launch.id for launch in written]
+        db.session.commit()
+
+        # `next` already carries the query string.
+        url, params = data['next'], None
+
+    return synced
+
+
+
+def refresh_suggestions():
+    """Brings the autocomplete index up to date with the launch data.
+
+    Reads the launch snapshot when there is one (rebuilding when a new file
+    lands), otherwise only the launches written since last time.
+    """
+
+    state = _suggest_source
+    if time.monotonic() - state['checked'] < SUGGEST_REFRESH_SECONDS:
+        return
+    if not _suggest_lock.acquire(blocking=False):
+        return  # Another request is refreshing; serve the current index.
+
+    try:
+        state['checked'] = time.monotonic()
+        snapshot = launch_snapshot.current()
+        if snapshot is not None:
+            if snapshot is not state['snapshot']:
+                rows = (snapshot.row(i) for i in range(len(snapshot)))
+                launch_suggestions.replace({row['uuid']: row for row in rows})
+                state['snapshot'] = snapshot
+            return
+
+        query = Launch.query.with_entities(
+            Launch.uuid, Launch.synced_at, Launch.name,
+            Launch.rocket_name, Launch.organization, Launch.pad_location_name
+        ).filter(Launch.synced_since(state['max_synced']))
+
+        changed = {}
+        for launch in query.yield_per(5000):
+            if launch.synced_at is not None and (
+                    state['max_synced'] is None or launch.synced_at > state['max_synced']):
+                state['max_synced'] = launch.synced_at
+            if launch.uuid:
+                changed[launch.uuid] = launch._asdict()
+        if changed:
+            launch_suggestions.update(changed)
+    finally:
+        _suggest_lock.release()
+
+
+
+def suggest_launches(prefix, limit=10):
+    refresh_suggestions()
+    return launch_suggestions.lookup(prefix, limit)
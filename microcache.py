@@ -0,0 +1,85 @@
+"""Whole-response microcache for anonymous pages.
+
+Logged-out visitors all get the same page, so `@microcache()` keeps the
+rendered response for a few seconds, keyed on path + query string. When an
+entry expires one request regenerates it while the others keep serving the
+stale copy (or wait for the first render if there is none yet), so a burst
+of traffic costs one render per TTL window.
+
+Requests from logged-in users, non-GET requests and requests with pending
+flash messages bypass the cache.
+"""
+
+import functools
+import threading
+import time
+
+from flask import Response, g, make_response, request, session
+
+
+class Microcache:
+    def __init__(self, maxsize=256, stripes=64):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = {}
+        # Regeneration locks are striped by key, so arbitrary query strings
+        # can't grow them the way a lock per key would.
+        self._key_locks = [threading.Lock() for _ in range(stripes)]
+
+    def _key_lock(self, key):
+        return self._key_locks[hash(key) % len(self._key_locks)]
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, expires, response):
+        with self._lock:
+            self._entries[key] = (expires, response.get_data(), response.status_code, response.mimetype)
+            if len(self._entries) > self.maxsize:
+                now = time.monotonic()
+                for stale in [k for k, entry in self._entries.items() if entry[0] < now]:
+                    del self._entries[stale]
+                while len(self._entries) > self.maxsize:
+                    del self._entries[next(iter(self._entries))]
+
+    def cached(self, ttl):
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if g.get('user') or request.method != 'GET' or '_flashes' in session:
+                    return view(*args, **kwargs)
+
+                key = request.full_path
+                entry = self.get(key)
+                if entry is not None and entry[0] > time.monotonic():
+                    return _replay(entry)
+
+                lock = self._key_lock(key)
+                # Someone else is regenerating: serve the stale copy if we have one.
+                if not lock.acquire(blocking=entry is None):
+                    return _replay(entry)
+                try:
+                    entry = self.get(key)
+                    if entry is not None and entry[0] > time.monotonic():
+                        return _replay(entry)
+
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code == 200 and not response.is_streamed:
+                        self.set(key, time.monotonic() + ttl, response)
+                    return response
+                finally:
+                    lock.release()
+            return wrapper
+        return decorator
+
+
+def _replay(entry):
+    _, body, status, mimetype = entry
+    return Response(body, status=status, mimetype=mimetype)
+
+
+response_cache = Microcache()
+
+
+def microcache(ttl=5):
+    return response_cache.cached(ttl)
@@ -0,0 +1,29 @@
+"""launch synced_at watermark
+
+Revision ID: 0a4c9e3b7d15
+Revises: f38b1e6d9a42
+Create Date: 2026-10-19 09:30:00.000000
+
+Existing rows are left NULL: incremental readers start with a full read, and
+rows are stamped the next time they are written.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a4c9e3b7d15'
+down_revision = 'f38b1e6d9a42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('launches', sa.Column('synced_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_launches_synced_at'), 'launches', ['synced_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_launches_synced_at'), table_name='launches')
+    op.drop_column('launches', 'synced_at')
@@ -0,0 +1,87 @@
+"""baseline schema
+
+Revision ID: a1c3e5f70b21
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+The tables as `db.create_all()` used to create them. Databases created that
+way already have them, so this revision only creates them on an empty
+database.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c3e5f70b21'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not op.get_context().as_sql and sa.inspect(op.get_bind()).has_table('users'):
+        return
+
+    op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.Text(), nullable=False),
+        sa.Column('email', sa.Text(), nullable=False),
+        sa.Column('password', sa.Text(), nullable=False),
+        sa.Column('bio', sa.Text(), nullable=True),
+        sa.Column('location', sa.Text(), nullable=True),
+        sa.Column('created_on', sa.DateTime(), nullable=False),
+        sa.Column('img_url', sa.Text(), nullable=True),
+        sa.Column('header_img_url', sa.Text(), nullable=True),
+        sa.Column('active', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email'),
+        sa.UniqueConstraint('username')
+    )
+    op.create_table('launches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.Text(), nullable=False),
+        sa.Column('last_updated', sa.DateTime(), nullable=True),
+        sa.Column('launch_date', sa.Text(), nullable=True),
+        sa.Column('img_url', sa.Text(), nullable=True),
+        sa.Column('status', sa.Text(), nullable=True),
+        sa.Column('rocket_name', sa.Text(), nullable=True),
+        sa.Column('rocket_variant', sa.Text(), nullable=True),
+        sa.Column('mission_name', sa.Text(), nullable=True),
+        sa.Column('mission_description', sa.Text(), nullable=True),
+        sa.Column('mission_type', sa.Text(), nullable=True),
+        sa.Column('mission_orbit', sa.Text(), nullable=True),
+        sa.Column('pad_name', sa.Text(), nullable=True),
+        sa.Column('pad_wiki_url', sa.Text(), nullable=True),
+        sa.Column('pad_map_url', sa.Text(), nullable=True),
+        sa.Column('pad_location_name', sa.Text(), nullable=True),
+        sa.Column('pad_map_img', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    op.create_table('collections',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.Text(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('img_url', sa.Text(), nullable=True),
+        sa.Column('createdDate', sa.DateTime(), nullable=False),
+        sa.Column('createdBy', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['createdBy'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('launch_collections',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('collectionID', sa.Integer(), nullable=False),
+        sa.Column('launchID', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['collectionID'], ['collections.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['launchID'], ['launches.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('launch_collections')
+    op.drop_table('collections')
+    op.drop_table('launches')
+    op.drop_table('users')
@@ -0,0 +1,53 @@
+"""denormalized counters and leaderboard
+
+Revision ID: b27d0c41e9a3
+Revises: a1c3e5f70b21
+Create Date: 2026-10-19 09:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b27d0c41e9a3'
+down_revision = 'a1c3e5f70b21'
+branch_labels = None
+depends_on = None
+
+LEADERBOARD_SIZE = 100
+
+
+def upgrade():
+    op.add_column('users', sa.Column('collection_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('collections', sa.Column('launch_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('launches', sa.Column('collector_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Same as models.recount(), for the rows that existed before the counters.
+    op.execute(
+        "UPDATE users SET collection_count = "
+        "(SELECT count(*) FROM collections WHERE collections.\"createdBy\" = users.id)")
+    op.execute(
+        "UPDATE collections SET launch_count = "
+        "(SELECT count(*) FROM launch_collections lc WHERE lc.\"collectionID\" = collections.id)")
+    op.execute(
+        "UPDATE launches SET collector_count = "
+        "(SELECT count(*) FROM launch_collections lc WHERE lc.\"launchID\" = launches.id)")
+
+    op.execute(f"""
+        CREATE MATERIALIZED VIEW launch_leaderboard AS
+        SELECT row_number() OVER (ORDER BY collector_count DESC, id) AS rank,
+               id, name, img_url, launch_date, collector_count
+        FROM launches
+        WHERE collector_count > 0
+        ORDER BY collector_count DESC, id
+        LIMIT {LEADERBOARD_SIZE}
+        WITH DATA""")
+    op.execute("CREATE UNIQUE INDEX launch_leaderboard_rank ON launch_leaderboard (rank)")
+
+
+def downgrade():
+    op.execute("DROP MATERIALIZED VIEW launch_leaderboard")
+    op.drop_column('launches', 'collector_count')
+    op.drop_column('collections', 'launch_count')
+    op.drop_column('users', 'collection_count')
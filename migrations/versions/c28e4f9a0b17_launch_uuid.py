@@ -0,0 +1,39 @@
+"""key launches by upstream uuid
+
+Revision ID: c28e4f9a0b17
+Revises: b27d0c41e9a3
+Create Date: 2026-10-19 09:10:00.000000
+
+Launch names are no longer unique: upstream renames and reuses them, and
+launches are matched by uuid instead. Rows stored before this revision keep
+a NULL uuid, and link to a search for their name, until `flask
+sync-launches` or a collect matches them by name and fills it in.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c28e4f9a0b17'
+down_revision = 'b27d0c41e9a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('launches', sa.Column('uuid', sa.Text(), nullable=True))
+    op.add_column('launches', sa.Column('organization', sa.Text(), nullable=True))
+    op.add_column('launches', sa.Column('organization_type', sa.Text(), nullable=True))
+    op.create_index(op.f('ix_launches_uuid'), 'launches', ['uuid'], unique=True)
+    op.drop_constraint('launches_name_key', 'launches', type_='unique')
+    op.create_index(op.f('ix_launches_name'), 'launches', ['name'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_launches_name'), table_name='launches')
+    op.create_unique_constraint('launches_name_key', 'launches', ['name'])
+    op.drop_index(op.f('ix_launches_uuid'), table_name='launches')
+    op.drop_column('launches', 'organization_type')
+    op.drop_column('launches', 'organization')
+    op.drop_column('launches', 'uuid')
@@ -0,0 +1,28 @@
+"""foreign key indexes
+
+Revision ID: d32a6b8c1e54
+Revises: c28e4f9a0b17
+Create Date: 2026-10-19 09:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd32a6b8c1e54'
+down_revision = 'c28e4f9a0b17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_collections_createdBy'), 'collections', ['createdBy'], unique=False)
+    op.create_index(op.f('ix_launch_collections_collectionID'), 'launch_collections', ['collectionID'], unique=False)
+    op.create_index(op.f('ix_launch_collections_launchID'), 'launch_collections', ['launchID'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_launch_collections_launchID'), table_name='launch_collections')
+    op.drop_index(op.f('ix_launch_collections_collectionID'), table_name='launch_collections')
+    op.drop_index(op.f('ix_collections_createdBy'), table_name='collections')
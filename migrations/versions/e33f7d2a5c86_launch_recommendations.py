@@ -0,0 +1,40 @@
+"""launch recommendations
+
+Revision ID: e33f7d2a5c86
+Revises: d32a6b8c1e54
+Create Date: 2026-10-19 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e33f7d2a5c86'
+down_revision = 'd32a6b8c1e54'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('launch_cooccurrences',
+        sa.Column('launch_id', sa.Integer(), nullable=False),
+        sa.Column('other_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['launch_id'], ['launches.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['other_id'], ['launches.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('launch_id', 'other_id')
+    )
+    op.create_table('launch_neighbors',
+        sa.Column('launch_id', sa.Integer(), nullable=False),
+        sa.Column('neighbor_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['launch_id'], ['launches.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['neighbor_id'], ['launches.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('launch_id', 'neighbor_id')
+    )
+
+
+def downgrade():
+    op.drop_table('launch_neighbors')
+    op.drop_table('launch_cooccurrences')
@@ -0,0 +1,54 @@
+"""personalized feed
+
+Revision ID: f38b1e6d9a42
+Revises: e33f7d2a5c86
+Create Date: 2026-10-19 09:25:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f38b1e6d9a42'
+down_revision = 'e33f7d2a5c86'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_launches_launch_date'), 'launches', ['launch_date'], unique=False)
+    op.create_index(op.f('ix_launches_organization'), 'launches', ['organization'], unique=False)
+    op.create_index(op.f('ix_launches_rocket_name'), 'launches', ['rocket_name'], unique=False)
+    op.create_index(op.f('ix_launches_pad_location_name'), 'launches', ['pad_location_name'], unique=False)
+
+    op.create_table('user_interests',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.Text(), nullable=False),
+        sa.Column('value', sa.Text(), nullable=False),
+        sa.Column('weight', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'kind', 'value')
+    )
+    op.create_index('ix_user_interests_kind_value', 'user_interests', ['kind', 'value'], unique=False)
+    op.create_table('feed_items',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('launch_id', sa.Integer(), nullable=False),
+        sa.Column('launch_date', sa.Text(), nullable=False),
+        sa.Column('score', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['launch_id'], ['launches.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'launch_id')
+    )
+    op.create_index('ix_feed_items_launch_id', 'feed_items', ['launch_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_feed_items_launch_id', table_name='feed_items')
+    op.drop_table('feed_items')
+    op.drop_index('ix_user_interests_kind_value', table_name='user_interests')
+    op.drop_table('user_interests')
+    op.drop_index(op.f('ix_launches_pad_location_name'), table_name='launches')
+    op.drop_index(op.f('ix_launches_rocket_name'), table_name='launches')
+    op.drop_index(op.f('ix_launches_organization'), table_name='launches')
+    op.drop_index(op.f('ix_launches_launch_date'), table_name='launches')
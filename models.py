@@ -2,11 +2,23 @@
 
 from flask_bcrypt import Bcrypt
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy import text
+from datetime import datetime, timedelta
+
+from routing import RoutingSession
 
 bcrypt = Bcrypt()
 
-db = SQLAlchemy()
+# Accounts with more collected launches than this are purged in batches.
+PURGE_THRESHOLD = 5000
+PURGE_BATCH_SIZE = 1000
+
+# Launch.synced_at is the writing transaction's start time, so a slow
+# transaction can commit rows stamped before a watermark a reader already
+# took. Incremental readers re-read this much before their watermark.
+SYNC_OVERLAP = timedelta(minutes=5)
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 
 class User(db.Model):
@@ -47,6 +59,9 @@ class User(db.Model):
     
     active = db.Column(
         db.Boolean, nullable=False, default=True)
+
+    collection_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default='0')
     
 
     def is_collected(user_id, launch_id):
@@ -90,7 +105,7 @@ class User(db.Model):
     def authenticate(cls, username, password):
         """Find user with `username` and `password`."""
 
-        user = cls.query.filter_by(username=username).first()
+        user = cls.query.filter_by(username=username, active=True).first()
 
         if user:
             is_auth = bcrypt.check_password_hash(user.password, password)
@@ -114,6 +129,61 @@ class User(db.Model):
 
         return user
 
+    def collected_count(self):
+        """Number of launch_collections rows the user owns, from the counters."""
+
+        return (db.session.query(db.func.coalesce(db.func.sum(Collection.launch_count), 0))
+                .filter(Collection.createdBy == self.id)
+                .scalar())
+
+    @classmethod
+    def delete(cls, user):
+        """Deletes user, releasing their collected launches' counters.
+
+        Collections and launch_collections go with the ON DELETE CASCADE
+        foreign keys, so this is two statements however big the account is.
+        """
+
+        collection_ids = db.session.query(Collection.id).filter(Collection.createdBy == user.id)
+        Launch.release_collectors(Launch_Collection.collectionID.in_(collection_ids.scalar_subquery()))
+
+        db.session.delete(user)
+
+    @classmethod
+    def purge(cls, user_id, batch_size=PURGE_BATCH_SIZE):
+        """Deletes a user in short transactions of at most `batch_size` rows.
+
+        Used for accounts too large to delete in one go; each batch commits,
+        so no lock is held for long and an interrupted purge can be resumed.
+        """
+
+        collection_ids = (db.session.query(Collection.id)
+                          .filter(Collection.createdBy == user_id)
+                          .scalar_subquery())
+
+        while True:
+            batch = [row.id for row in db.session.query(Launch_Collection.id)
+                     .filter(Launch_Collection.collectionID.in_(collection_ids))
+                     .limit(batch_size)]
+            if not batch:
+                break
+            Launch.release_collectors(Launch_Collection.id.in_(batch))
+            Launch_Collection.query.filter(Launch_Collection.id.in_(batch)).delete(
+                synchronize_session=False)
+            db.session.commit()
+
+        while True:
+            batch = [row.id for row in db.session.query(Collection.id)
+                     .filter(Collection.createdBy == user_id)
+                     .limit(batch_size)]
+            if not batch:
+                break
+            Collection.query.filter(Collection.id.in_(batch)).delete(synchronize_session=False)
+            db.session.commit()
+
+        cls.query.filter_by(id=user_id).delete(synchronize_session=False)
+        db.session.commit()
+
 
 
 class Launch(db.Model):
@@ -122,12 +192,15 @@ class Launch(db.Model):
     __tablename__ = 'launches' 
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.Text, nullable=False, unique=True)
+    uuid = db.Column(db.Text, unique=True, index=True)
+    name = db.Column(db.Text, nullable=False, index=True)
     last_updated = db.Column(db.DateTime, default=datetime.now())
-    launch_date = db.Column(db.Text)
+    launch_date = db.Column(db.Text, index=True)
     img_url = db.Column(db.Text)
     status = db.Column(db.Text)
-    rocket_name = db.Column(db.Text)
+    organization = db.Column(db.Text, index=True)
+    organization_type = db.Column(db.Text)
+    rocket_name = db.Column(db.Text, index=True)
     rocket_variant = db.Column(db.Text)
     mission_name = db.Column(db.Text)
     mission_description = db.Column(db.Text)
@@ -136,20 +209,32 @@ class Launch(db.Model):
     pad_name = db.Column(db.Text)
     pad_wiki_url = db.Column(db.Text)
     pad_map_url = db.Column(db.Text)
-    pad_location_name = db.Column(db.Text)
+    pad_location_name = db.Column(db.Text, index=True)
     pad_map_img = db.Column(db.Text)
+    collector_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # When this row was last written here; upstream's last_updated doesn't
+    # follow the order rows are written in.
+    synced_at = db.Column(db.DateTime, index=True)
 
 
-    collections = db.relationship('Launch_Collection', back_populates='launch')
+    collections = db.relationship('Launch_Collection', back_populates='launch', passive_deletes=True)
 
     def __init__(self, launch):
         """Check if launch already exists in Db. If not, initialize new launch object"""
 
+        self.update_from(launch)
+
+    def update_from(self, launch):
+        """Copies the launch/rocket/mission/pad sections from helpers.get_launch."""
+
+        self.uuid = launch[0]['ID']
         self.name = launch[0]['Name']
         self.last_updated = launch[0]['Last_Updated']
         self.launch_date = launch[0]['Launch_Date']
         self.img_url = launch[0]['Img_URL']
         self.status = launch[0]['Status']
+        self.organization = launch[0]['Organization']
+        self.organization_type = launch[0]['Organization_Type']
         self.rocket_name = launch[1]['Rocket_Name']
         self.rocket_variant = launch[1]['Rocket_Variant']
         self.mission_name = launch[2]['Mission_Name']
@@ -161,11 +246,68 @@ class Launch(db.Model):
         self.pad_map_url = launch[3]['Pad_Map_URL']
         self.pad_location_name = launch[3]['Pad_Location_Name']
         self.pad_map_img = launch[3]['Pad_Map_Img']
+        self.synced_at = db.func.now()
 
 
     def __repr__(self):
         return f"<Launch #{self.id}: {self.name}, on {self.launch_date}, at {self.pad_name}, {self.status}>"
 
+    @classmethod
+    def stored(cls, sections):
+        """Stored launches for a list of helpers.parse_launch results, keyed by uuid.
+
+        Rows saved before launches were keyed by uuid have none, so they are
+        matched by name instead; update_from then fills their uuid in.
+        """
+
+        stored = {launch.uuid: launch for launch in
+                  cls.query.filter(cls.uuid.in_([launch[0]['ID'] for launch in sections]))}
+        unmatched = {launch[0]['Name']: launch[0]['ID'] for launch in sections
+                     if launch[0]['ID'] not in stored}
+        if unmatched:
+            for launch in cls.query.filter(cls.uuid.is_(None), cls.name.in_(list(unmatched))):
+                stored.setdefault(unmatched[launch.name], launch)
+        return stored
+
+    @classmethod
+    def synced_since(cls, watermark):
+        """Criterion for launches written since `watermark`, a synced_at value.
+
+        Includes SYNC_OVERLAP before it, so readers must tolerate seeing a
+        launch again. With no watermark, matches every launch.
+        """
+
+        if watermark is None:
+            return db.true()
+        return cls.synced_at > watermark - SYNC_OVERLAP
+
+    @classmethod
+    def adjust_collectors(cls, launch_id, delta):
+        """Adds `delta` to a launch's collector_count."""
+
+        cls.query.filter_by(id=launch_id).update(
+            {cls.collector_count: cls.collector_count + delta}, synchronize_session=False)
+
+    @classmethod
+    def release_collectors(cls, *criteria):
+        """Decrements collector_count for the Launch_Collection rows matching `criteria`.
+
+        Runs as a single UPDATE ... FROM, however many launches are affected.
+        """
+
+        removed = (db.session.query(
+                        Launch_Collection.launchID.label('launch_id'),
+                        db.func.count().label('n'))
+                   .filter(*criteria)
+                   .group_by(Launch_Collection.launchID)
+                   .subquery())
+
+        db.session.execute(
+            db.update(cls)
+            .where(cls.id == removed.c.launch_id)
+            .values(collector_count=cls.collector_count - removed.c.n)
+            .execution_options(synchronize_session=False))
+
 
 
 class Launch_Collection(db.Model):
@@ -179,16 +321,41 @@ class Launch_Collection(db.Model):
     )
     collectionID = db.Column(db.Integer,
         db.ForeignKey('collections.id', ondelete='CASCADE'),
-        nullable=False
+        nullable=False,
+        index=True
     )
     launchID = db.Column(db.Integer,
         db.ForeignKey('launches.id', ondelete='CASCADE'),
-        nullable=False
+        nullable=False,
+        index=True
     )
 
     collection = db.relationship('Collection', back_populates='launches')
     launch = db.relationship('Launch', back_populates='collections')
 
+    @classmethod
+    def collect(cls, collection_id, launch_id):
+        """Adds launch to collection and bumps both counters."""
+
+        launch_collection = cls(collectionID=collection_id, launchID=launch_id)
+        db.session.add(launch_collection)
+
+        Collection.query.filter_by(id=collection_id).update(
+            {Collection.launch_count: Collection.launch_count + 1}, synchronize_session=False)
+        Launch.adjust_collectors(launch_id, 1)
+
+        return launch_collection
+
+    @classmethod
+    def uncollect(cls, launch_collection):
+        """Removes launch from collection and drops both counters."""
+
+        Collection.query.filter_by(id=launch_collection.collectionID).update(
+            {Collection.launch_count: Collection.launch_count - 1}, synchronize_session=False)
+        Launch.adjust_collectors(launch_collection.launchID, -1)
+
+        db.session.delete(launch_collection)
+
 
 class Collection(db.Model):
     """A collection of launches"""
@@ -220,11 +387,21 @@ class Collection(db.Model):
         db.Integer,
         db.ForeignKey('users.id', ondelete='CASCADE'),
         nullable=False,
+        index=True,
     )
 
-    user = db.relationship('User', backref='collections')
+    launch_count = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0,
+        server_default='0'
+    )
 
-    launches = db.relationship("Launch_Collection", back_populates='collection')
+    user = db.relationship('User', backref=db.backref(
+        'collections', cascade='all, delete-orphan', passive_deletes=True))
+
+    launches = db.relationship("Launch_Collection", back_populates='collection',
+                               cascade='all, delete-orphan', passive_deletes=True)
     
     @classmethod
     def create(cls, name, description, img_url, createdBy):
@@ -238,6 +415,26 @@ class Collection(db.Model):
         )
 
         db.session.add(collection)
+        User.query.filter_by(id=createdBy).update(
+            {User.collection_count: User.collection_count + 1}, synchronize_session=False)
+        return collection
+
+    @classmethod
+    def delete(cls, collection_id):
+        """Deletes a collection and releases its counters."""
+
+        collection = cls.query.get(collection_id)
+        if collection is None:
+            return None
+
+        Launch.release_collectors(Launch_Collection.collectionID == collection_id)
+        User.query.filter_by(id=collection.createdBy).update(
+            {User.collection_count: User.collection_count - 1}, synchronize_session=False)
+
+        # launch_collections rows go with the ON DELETE CASCADE foreign key.
+        # Flush so raw SQL run before the commit no longer sees the collection.
+        db.session.delete(collection)
+        db.session.flush()
         return collection
     
     @classmethod
@@ -253,6 +450,111 @@ class Collection(db.Model):
         return collection
 
 
+class Launch_Cooccurrence(db.Model):
+    """How many collections hold both launches. Stored in both directions."""
+
+    __tablename__ = 'launch_cooccurrences'
+
+    launch_id = db.Column(db.Integer,
+        db.ForeignKey('launches.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    other_id = db.Column(db.Integer,
+        db.ForeignKey('launches.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class Launch_Neighbor(db.Model):
+    """Precomputed "collectors also collected" recommendations for a launch."""
+
+    __tablename__ = 'launch_neighbors'
+
+    launch_id = db.Column(db.Integer,
+        db.ForeignKey('launches.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    neighbor_id = db.Column(db.Integer,
+        db.ForeignKey('launches.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    score = db.Column(db.Float, nullable=False)
+
+    neighbor = db.relationship('Launch', foreign_keys=[neighbor_id])
+
+
+class User_Interest(db.Model):
+    """How many of a user's collected launches share a provider, rocket or pad."""
+
+    __tablename__ = 'user_interests'
+    __table_args__ = (db.Index('ix_user_interests_kind_value', 'kind', 'value'),)
+
+    user_id = db.Column(db.Integer,
+        db.ForeignKey('users.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    kind = db.Column(db.Text, primary_key=True)
+    value = db.Column(db.Text, primary_key=True)
+    weight = db.Column(db.Integer, nullable=False, default=0)
+
+
+class Feed_Item(db.Model):
+    """A precomputed entry in a user's upcoming launch feed."""
+
+    __tablename__ = 'feed_items'
+    __table_args__ = (db.Index('ix_feed_items_launch_id', 'launch_id'),)
+
+    user_id = db.Column(db.Integer,
+        db.ForeignKey('users.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    launch_id = db.Column(db.Integer,
+        db.ForeignKey('launches.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    launch_date = db.Column(db.Text, nullable=False)
+    score = db.Column(db.Integer, nullable=False)
+
+    launch = db.relationship('Launch')
+
+
+def recount():
+    """Rebuilds every denormalized counter from the source tables."""
+
+    db.session.execute(text(
+        "UPDATE users SET collection_count = "
+        "(SELECT count(*) FROM collections WHERE collections.\"createdBy\" = users.id)"))
+    db.session.execute(text(
+        "UPDATE collections SET launch_count = "
+        "(SELECT count(*) FROM launch_collections lc WHERE lc.\"collectionID\" = collections.id)"))
+    db.session.execute(text(
+        "UPDATE launches SET collector_count = "
+        "(SELECT count(*) FROM launch_collections lc WHERE lc.\"launchID\" = launches.id)"))
+    db.session.commit()
+
+
+######################### Leaderboard ############################
+
+LEADERBOARD_SIZE = 100
+
+
+def refresh_leaderboard():
+    """Refreshes the leaderboard without blocking readers."""
+
+    db.session.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY launch_leaderboard"))
+    db.session.commit()
+
+
+def leaderboard(limit=LEADERBOARD_SIZE):
+    """Returns the most-collected launches from the last refresh."""
+
+    return db.session.execute(text(
+        "SELECT lb.rank, lb.id, l.uuid, lb.name, lb.img_url, lb.launch_date, lb.collector_count "
+        "FROM launch_leaderboard lb JOIN launches l ON l.id = lb.id "
+        "ORDER BY lb.rank LIMIT :limit"), {'limit': limit}).all()
+
+
 def connect_db(app):
     """Connect this database to provided Flask app.
         Sets the context for the app.    
@@ -262,4 +564,5 @@ def connect_db(app):
     db.init_app(app)
     app_ctx = app.app_context()
     app_ctx.push()
-    db.create_all()
+    # The schema, including the leaderboard view, is managed by Flask-Migrate
+    # (`flask db upgrade`).
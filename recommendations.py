@@ -0,0 +1,209 @@
+""""Collectors also collected" recommendations.
+
+Two launches are related when collections hold both of them. The full
+launch x launch co-occurrence matrix is built offline with sparse matrices
+(`flask build-recommendations`) and kept up to date on every collect and
+uncollect with a handful of set-based statements, so launch pages only read
+the stored top-K neighbors.
+
+A neighbor's score is its co-occurrence count plus a small bonus for sharing
+the rocket, pad location or orbit, which breaks ties between equally
+co-collected launches.
+"""
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import text
+from sqlalchemy.orm import joinedload
+
+from models import db, Launch, Launch_Collection, Launch_Cooccurrence, Launch_Neighbor
+
+TOP_K = 10
+ROCKET_WEIGHT = 0.5
+PAD_WEIGHT = 0.3
+ORBIT_WEIGHT = 0.2
+INSERT_BATCH = 10000
+
+WEIGHTS = {'rocket_weight': ROCKET_WEIGHT, 'pad_weight': PAD_WEIGHT, 'orbit_weight': ORBIT_WEIGHT}
+
+# Score of co-occurrence row `co` between launches `a` (the launch) and `b` (the neighbor).
+SCORE_SQL = """
+    co.count
+    + CASE WHEN a.rocket_name = b.rocket_name THEN :rocket_weight ELSE 0 END
+    + CASE WHEN a.pad_location_name = b.pad_location_name THEN :pad_weight ELSE 0 END
+    + CASE WHEN a.mission_orbit = b.mission_orbit THEN :orbit_weight ELSE 0 END"""
+
+# The other launches in collection :collection_id.
+COLLECTION_PEERS_SQL = """
+    SELECT lc."launchID" FROM launch_collections lc
+    WHERE lc."collectionID" = :collection_id AND lc."launchID" <> :launch_id"""
+
+
+def neighbors(launch_id, limit=TOP_K):
+    """The stored recommendations for a launch, best first."""
+
+    return (Launch_Neighbor.query
+            .options(joinedload(Launch_Neighbor.neighbor))
+            .filter_by(launch_id=launch_id)
+            .order_by(Launch_Neighbor.score.desc())
+            .limit(limit)
+            .all())
+
+
+######################### Offline build ############################
+
+def _codes(values):
+    """Integer codes for `values`, with -1 for missing so they never match."""
+
+    values = np.array([value or '' for value in values], dtype=object)
+    _, codes = np.unique(values, return_inverse=True)
+    codes[values == ''] = -1
+    return codes
+
+
+def build(top_k=TOP_K):
+    """Rebuilds the co-occurrence matrix and every launch's neighbors."""
+
+    pairs = np.array(db.session.query(
+        Launch_Collection.collectionID, Launch_Collection.launchID).all(), dtype=np.int64)
+
+    db.session.query(Launch_Neighbor).delete()
+    db.session.query(Launch_Cooccurrence).delete()
+    if len(pairs) == 0:
+        db.session.commit()
+        return 0
+
+    collections, collection_index = np.unique(pairs[:, 0], return_inverse=True)
+    launch_ids, launch_index = np.unique(pairs[:, 1], return_inverse=True)
+
+    # Collection x launch incidence matrix; A.T @ A counts shared collections.
+    incidence = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.int32), (collection_index, launch_index)),
+        shape=(len(collections), len(launch_ids)))
+    incidence.data[:] = 1
+    cooccurrence = (incidence.T @ incidence).tocoo()
+
+    off_diagonal = cooccurrence.row != cooccurrence.col
+    rows = cooccurrence.row[off_diagonal]
+    cols = cooccurrence.col[off_diagonal]
+    counts = cooccurrence.data[off_diagonal]
+
+    attributes = dict(
+        (launch_id, (rocket, pad, orbit)) for launch_id, rocket, pad, orbit in
+        db.session.query(Launch.id, Launch.rocket_name, Launch.pad_location_name, Launch.mission_orbit)
+        .filter(Launch.id.in_(launch_ids.tolist())))
+    rocket, pad, orbit = (
+        _codes([attributes.get(launch_id, (None,) * 3)[i] for launch_id in launch_ids.tolist()])
+        for i in range(3))
+
+    def same(codes):
+        return (codes[rows] == codes[cols]) & (codes[rows] >= 0)
+
+    scores = (counts
+              + ROCKET_WEIGHT * same(rocket)
+              + PAD_WEIGHT * same(pad)
+              + ORBIT_WEIGHT * same(orbit))
+
+    # Rank each launch's candidates by score and keep the top K.
+    order = np.lexsort((-scores, rows))
+    sorted_rows = rows[order]
+    rank = np.arange(len(order)) - np.searchsorted(sorted_rows, sorted_rows)
+    top = order[rank < top_k]
+
+    _insert(Launch_Cooccurrence, {
+        'launch_id': launch_ids[rows], 'other_id': launch_ids[cols], 'count': counts})
+    _insert(Launch_Neighbor, {
+        'launch_id': launch_ids[rows[top]], 'neighbor_id': launch_ids[cols[top]], 'score': scores[top]})
+
+    db.session.commit()
+    return len(launch_ids)
+
+
+def _insert(model, columns):
+    names = list(columns)
+    values = [columns[name].tolist() for name in names]
+    total = len(values[0])
+    for start in range(0, total, INSERT_BATCH):
+        db.session.execute(model.__table__.insert(), [
+            dict(zip(names, row)) for row in zip(*(v[start:start + INSERT_BATCH] for v in values))])
+
+
+######################### Incremental updates ############################
+
+def record_collect(collection_id, launch_id, top_k=TOP_K):
+    """Folds "launch_id joined collection_id" into the matrix and neighbor lists."""
+
+    params = {'collection_id': collection_id, 'launch_id': launch_id}
+    db.session.execute(text(f"""
+        INSERT INTO launch_cooccurrences (launch_id, other_id, count)
+        SELECT :launch_id, peer."launchID", 1 FROM ({COLLECTION_PEERS_SQL}) peer
+        UNION ALL
+        SELECT peer."launchID", :launch_id, 1 FROM ({COLLECTION_PEERS_SQL}) peer
+        ON CONFLICT (launch_id, other_id)
+        DO UPDATE SET count = launch_cooccurrences.count + 1"""), params)
+
+    _refresh_peers(params, top_k)
+
+
+def record_uncollect(collection_id, launch_id, top_k=TOP_K):
+    """Removes "launch_id was in collection_id" from the matrix and neighbor lists."""
+
+    params = {'collection_id': collection_id, 'launch_id': launch_id}
+    db.session.execute(text(f"""
+        UPDATE launch_cooccurrences SET count = count - 1
+        WHERE (launch_id = :launch_id AND other_id IN ({COLLECTION_PEERS_SQL}))
+           OR (other_id = :launch_id AND launch_id IN ({COLLECTION_PEERS_SQL}))"""), params)
+    db.session.execute(text(f"""
+        DELETE FROM launch_cooccurrences
+        WHERE count <= 0
+          AND (launch_id = :launch_id OR other_id = :launch_id)"""), params)
+    db.session.execute(text(f"""
+        DELETE FROM launch_neighbors n
+        WHERE n.neighbor_id = :launch_id
+          AND n.launch_id IN ({COLLECTION_PEERS_SQL})
+          AND NOT EXISTS (SELECT 1 FROM launch_cooccurrences co
+                          WHERE co.launch_id = n.launch_id AND co.other_id = :launch_id)"""), params)
+
+    _refresh_peers(params, top_k)
+
+
+def _refresh_peers(params, top_k):
+    """Recomputes the launch's own neighbors and its entry in each peer's list.
+
+    Peers whose list shrank below K on uncollect are topped up by the next
+    offline build.
+    """
+
+    params = dict(params, top_k=top_k, **WEIGHTS)
+
+    db.session.execute(text("DELETE FROM launch_neighbors WHERE launch_id = :launch_id"), params)
+    db.session.execute(text(f"""
+        INSERT INTO launch_neighbors (launch_id, neighbor_id, score)
+        SELECT co.launch_id, co.other_id, {SCORE_SQL}
+        FROM launch_cooccurrences co
+        JOIN launches a ON a.id = co.launch_id
+        JOIN launches b ON b.id = co.other_id
+        WHERE co.launch_id = :launch_id
+        ORDER BY 3 DESC, co.other_id
+        LIMIT :top_k"""), params)
+
+    db.session.execute(text(f"""
+        INSERT INTO launch_neighbors (launch_id, neighbor_id, score)
+        SELECT co.launch_id, co.other_id, {SCORE_SQL}
+        FROM launch_cooccurrences co
+        JOIN launches a ON a.id = co.launch_id
+        JOIN launches b ON b.id = co.other_id
+        WHERE co.other_id = :launch_id
+          AND co.launch_id IN ({COLLECTION_PEERS_SQL})
+        ON CONFLICT (launch_id, neighbor_id) DO UPDATE SET score = EXCLUDED.score"""), params)
+
+    db.session.execute(text(f"""
+        DELETE FROM launch_neighbors n
+        USING (SELECT launch_id, neighbor_id,
+                      row_number() OVER (PARTITION BY launch_id
+                                         ORDER BY score DESC, neighbor_id) AS rank
+               FROM launch_neighbors
+               WHERE launch_id IN ({COLLECTION_PEERS_SQL})) ranked
+        WHERE n.launch_id = ranked.launch_id
+          AND n.neighbor_id = ranked.neighbor_id
+          AND ranked.rank > :top_k"""), params)
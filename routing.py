@@ -0,0 +1,141 @@
+"""Read/write routing between the primary database and read replicas.
+
+Replicas are extra Flask-SQLAlchemy binds (`replica_0`, `replica_1`, ...)
+configured from DATABASE_REPLICA_URLS. Views decorated with @read_only send
+their queries to a replica picked round-robin, skipping any replica whose
+replication lag is over REPLICA_MAX_LAG_SECONDS. A request keeps the replica
+it was given for all its queries, so one page never mixes replicas at
+different lag. Everything else, and every flush, goes to the primary.
+
+For REPLICA_STICKY_SECONDS after a user's request writes to the database,
+their read-only requests also go to the primary, so they see their own
+collects and edits before the replicas catch up.
+"""
+
+import functools
+import itertools
+import os
+import threading
+import time
+
+from flask import g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+REPLICA_PREFIX = 'replica_'
+WROTE_AT_KEY = 'wrote_at'
+
+REPLICA_URLS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',')
+                if url.strip()]
+MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 5))
+STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+LAG_CHECK_SECONDS = 5
+
+LAG_SQL = text(
+    "SELECT CASE WHEN pg_is_in_recovery() "
+    "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "ELSE 0 END")
+
+
+def replica_binds():
+    """SQLALCHEMY_BINDS entries for the configured replicas."""
+
+    return {f"{REPLICA_PREFIX}{i}": url for i, url in enumerate(REPLICA_URLS)}
+
+
+def read_only(view):
+    """Marks a view as safe to serve from a replica."""
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaSet:
+    """Round-robin over the replicas whose lag was acceptable at the last check."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._healthy = []
+        self._checked = 0
+
+    def _check(self, engines):
+        healthy = []
+        for key, engine in sorted(engines.items(), key=lambda item: str(item[0])):
+            if not str(key).startswith(REPLICA_PREFIX):
+                continue
+            try:
+                with engine.connect() as connection:
+                    lag = connection.execute(LAG_SQL).scalar()
+            except Exception:
+                continue
+            if lag is not None and lag <= MAX_LAG_SECONDS:
+                healthy.append(engine)
+        return healthy
+
+    def choose(self, engines):
+        """A healthy replica engine, or None to fall back to the primary."""
+
+        now = time.monotonic()
+        if now - self._checked > LAG_CHECK_SECONDS and self._lock.acquire(blocking=False):
+            try:
+                self._healthy = self._check(engines)
+                self._checked = now
+            finally:
+                self._lock.release()
+
+        healthy = self._healthy
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+
+replicas = ReplicaSet()
+
+
+def _wants_replica():
+    if not REPLICA_URLS or not has_request_context() or not g.get('read_only'):
+        return False
+    return time.time() - session.get(WROTE_AT_KEY, 0) > STICKY_SECONDS
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends read-only requests to replicas."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _wants_replica():
+            # None means no healthy replica: the request stays on the primary.
+            if 'replica' not in g:
+                g.replica = replicas.choose(self._db.engines)
+            if g.replica is not None:
+                return g.replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _remember_write(db_session):
+    # Only write paths commit, so any commit starts the sticky window.
+    if has_request_context():
+        g.wrote = True
+
+
+def reset_routing():
+    """before_request hook: forget the previous request's routing state.
+
+    connect_db pushes one app context for the whole process, so `g` is
+    shared by every request served on a thread unless it's cleared here.
+    """
+
+    for key in ('read_only', 'replica', 'wrote'):
+        g.pop(key, None)
+
+
+def stick_to_primary(response):
+    """after_request hook: start the user's read-your-writes window."""
+
+    if g.get('wrote'):
+        session[WROTE_AT_KEY] = time.time()
+    return response
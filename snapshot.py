@@ -0,0 +1,265 @@
+"""Read-only, memory-mapped launch snapshots.
+
+`flask export-snapshot` writes every stored Launch into a single columnar
+file. Web workers open it with mmap, so all gunicorn workers on a host share
+one copy of its pages and can serve the launch index, launch pages and search
+without touching Postgres or Launch Library.
+
+File layout (all integers little-endian):
+
+    magic      8 bytes  b'LTSNAP\\x00\\x00'
+    header     <HIIH    version, created (unix time), rows, columns
+    columns    per column: <H name length, name, <QQ offsets position, blob position
+    indexes    <QQ      name index position, uuid index position
+    ...        column offsets (uint32 * rows + 1) and utf-8 blobs
+    ...        name index and uuid index (uint32 row numbers)
+
+Rows are ordered by launch date. The name index orders rows by lowercased
+name and the uuid index by uuid, so both are searched with bisect. Search
+also scans a lowercased name/rocket/provider/pad location column, matching
+Launch Library's `search` parameter.
+
+New snapshots are written to a temporary file and renamed over the old one;
+readers notice the new inode and remap.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+
+MAGIC = b'LTSNAP\x00\x00'
+VERSION = 2
+HEADER = struct.Struct('<HIIH')
+COLUMN = struct.Struct('<QQ')
+INDEXES = struct.Struct('<QQ')
+
+# The Launch model's fields, in snapshot column order.
+FIELDS = (
+    'uuid', 'name', 'last_updated', 'launch_date', 'img_url', 'status',
+    'organization', 'organization_type', 'rocket_name', 'rocket_variant',
+    'mission_name', 'mission_description', 'mission_type', 'mission_orbit',
+    'pad_name', 'pad_wiki_url', 'pad_map_url', 'pad_location_name', 'pad_map_img',
+)
+# Lowercased names, used by search.
+NAME_KEY = 'name_key'
+# Lowercased searchable fields joined by SEARCH_SEPARATOR, used by search.
+SEARCH_KEY = 'search_key'
+SEARCH_FIELDS = ('name', 'rocket_name', 'organization', 'pad_location_name')
+SEARCH_SEPARATOR = '\x1f'
+
+
+class SnapshotError(Exception):
+    """Raised for missing, truncated or incompatible snapshot files."""
+
+
+def _uint32s(values):
+    arr = array('I', values)
+    if sys.byteorder != 'little':
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def write_snapshot(path, launches):
+    """Writes `launches` (Launch objects or dicts of FIELDS) to `path` atomically."""
+
+    rows = []
+    for launch in launches:
+        get = launch.get if isinstance(launch, dict) else lambda f: getattr(launch, f)
+        rows.append(['' if get(f) is None else str(get(f)) for f in FIELDS])
+    rows.sort(key=lambda row: (row[FIELDS.index('launch_date')], row[0]))
+
+    names = [row[FIELDS.index('name')].lower() for row in rows]
+    search_keys = [SEARCH_SEPARATOR.join(row[FIELDS.index(f)] for f in SEARCH_FIELDS).lower()
+                   for row in rows]
+    columns = list(FIELDS) + [NAME_KEY, SEARCH_KEY]
+    data = [[row[i] for row in rows] for i in range(len(FIELDS))] + [names, search_keys]
+
+    header_size = len(MAGIC) + HEADER.size + INDEXES.size + sum(
+        2 + len(name.encode()) + COLUMN.size for name in columns)
+
+    body = []
+    position = header_size
+    column_table = []
+    for name, values in zip(columns, data):
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = [0]
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+        offsets_bytes = _uint32s(offsets)
+        blob = b''.join(encoded)
+
+        column_table.append((name, position, position + len(offsets_bytes)))
+        body += [offsets_bytes, blob]
+        position += len(offsets_bytes) + len(blob)
+        # Keep the next uint32 array aligned for memoryview casts.
+        padding = -position % 4
+        body.append(b'\x00' * padding)
+        position += padding
+
+    name_index = _uint32s(sorted(range(len(rows)), key=lambda i: names[i]))
+    uuid_index = _uint32s(sorted(range(len(rows)), key=lambda i: rows[i][0]))
+    indexes = INDEXES.pack(position, position + len(name_index))
+    body += [name_index, uuid_index]
+
+    header = [MAGIC, HEADER.pack(VERSION, int(time.time()), len(rows), len(columns))]
+    for name, offsets_pos, blob_pos in column_table:
+        encoded = name.encode()
+        header += [struct.pack('<H', len(encoded)), encoded, COLUMN.pack(offsets_pos, blob_pos)]
+    header.append(indexes)
+
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.writelines(header + body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(rows)
+
+
+class Snapshot:
+    """A single mapped snapshot file."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.mm[:len(MAGIC)] != MAGIC:
+            raise SnapshotError(f"{path} is not a launch snapshot")
+        version, self.created, self.rows, ncols = HEADER.unpack_from(self.mm, len(MAGIC))
+        if version != VERSION:
+            raise SnapshotError(f"{path} is snapshot version {version}, expected {VERSION}")
+        if sys.byteorder != 'little':
+            raise SnapshotError("Snapshots can only be mapped on little-endian hosts")
+
+        view = memoryview(self.mm)
+        pos = len(MAGIC) + HEADER.size
+        self.columns = {}
+        for _ in range(ncols):
+            (length,) = struct.unpack_from('<H', self.mm, pos)
+            name = bytes(self.mm[pos + 2:pos + 2 + length]).decode()
+            offsets_pos, blob_pos = COLUMN.unpack_from(self.mm, pos + 2 + length)
+            offsets = view[offsets_pos:offsets_pos + 4 * (self.rows + 1)].cast('I')
+            self.columns[name] = (offsets, blob_pos)
+            pos += 2 + length + COLUMN.size
+
+        name_pos, uuid_pos = INDEXES.unpack_from(self.mm, pos)
+        self.name_index = view[name_pos:name_pos + 4 * self.rows].cast('I')
+        self.uuid_index = view[uuid_pos:uuid_pos + 4 * self.rows].cast('I')
+
+    def __len__(self):
+        return self.rows
+
+    def value(self, column, row):
+        offsets, blob_pos = self.columns[column]
+        return self.mm[blob_pos + offsets[row]:blob_pos + offsets[row + 1]].decode('utf-8')
+
+    def row(self, row):
+        return {field: self.value(field, row) or None for field in FIELDS}
+
+    def page(self, offset, limit):
+        """Rows in launch-date order."""
+
+        return [self.row(i) for i in range(max(offset, 0), min(offset + limit, self.rows))]
+
+    def _bisect(self, index, column, key):
+        lo, hi = 0, self.rows
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.value(column, index[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def by_uuid(self, uuid):
+        i = self._bisect(self.uuid_index, 'uuid', uuid)
+        if i < self.rows and self.value('uuid', self.uuid_index[i]) == uuid:
+            return self.row(self.uuid_index[i])
+        return None
+
+    def search(self, term):
+        """Row numbers whose name, rocket, provider or pad location contains `term`.
+
+        Launches whose name starts with `term` come first.
+        """
+
+        term = term.lower()
+        if not term:
+            return []
+
+        matches = []
+        i = self._bisect(self.name_index, NAME_KEY, term)
+        while i < self.rows and self.value(NAME_KEY, self.name_index[i]).startswith(term):
+            matches.append(self.name_index[i])
+            i += 1
+
+        # Substring matches: scan the search blob directly, then map byte
+        # positions back to rows through the offsets array.
+        seen = set(matches)
+        offsets, blob_pos = self.columns[SEARCH_KEY]
+        needle = term.encode('utf-8')
+        blob_end = blob_pos + offsets[self.rows]
+        found = self.mm.find(needle, blob_pos, blob_end)
+        substring = []
+        while found != -1:
+            lo, hi = 0, self.rows
+            target = found - blob_pos
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if offsets[mid + 1] <= target:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            row_end = blob_pos + offsets[lo + 1]
+            if found + len(needle) > row_end:
+                # The match straddles two rows; keep looking.
+                found = self.mm.find(needle, found + 1, blob_end)
+                continue
+            if lo not in seen:
+                seen.add(lo)
+                substring.append(lo)
+            found = self.mm.find(needle, row_end, blob_end)
+
+        return matches + sorted(substring)
+
+
+class SnapshotReader:
+    """Process-wide handle on the current snapshot, remapped when it's replaced."""
+
+    def __init__(self, path, check_interval=5):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked = 0
+
+    def current(self):
+        """The current Snapshot, or None if there is no usable snapshot file."""
+
+        if not self.path:
+            return None
+
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return self._snapshot
+
+        with self._lock:
+            if now - self._checked >= self.check_interval:
+                self._checked = now
+                try:
+                    inode = os.stat(self.path).st_ino
+                    if self._snapshot is None or self._snapshot.inode != inode:
+                        # The old mapping is released once in-flight
+                        # requests drop their reference to it.
+                        self._snapshot = Snapshot(self.path)
+                except (OSError, SnapshotError, ValueError):
+                    self._snapshot = None
+        return self._snapshot
+
+
+launch_snapshot = SnapshotReader(os.environ.get('LAUNCH_SNAPSHOT'))
@@ -0,0 +1,233 @@
+"""Launch statistics over the mirrored launches table.
+
+Launches are reduced to integer codes (provider, month, rocket, outcome, pad,
+orbit) and counted into dense NumPy cubes. Refreshing only reads launches
+written locally since the previous refresh (by Launch.synced_at): their old
+contribution is subtracted and the new one added, so a page view never scans
+the table.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from models import Launch
+
+OUTCOMES = ('Success', 'Failure', 'Other')
+UNKNOWN = 'Unknown'
+
+
+def outcome(status):
+    """Buckets a Launch Library status name into OUTCOMES."""
+
+    status = (status or '').lower()
+    if 'fail' in status:
+        return 'Failure'
+    if 'success' in status:
+        return 'Success'
+    return 'Other'
+
+
+class Vocabulary:
+    """Stable string -> integer code mapping that only grows."""
+
+    def __init__(self, values=()):
+        self.codes = {}
+        self.values = []
+        for value in values:
+            self.code(value)
+
+    def code(self, value):
+        value = value or UNKNOWN
+        if value not in self.codes:
+            self.codes[value] = len(self.values)
+            self.values.append(value)
+        return self.codes[value]
+
+    def copy(self):
+        other = Vocabulary()
+        other.codes = dict(self.codes)
+        other.values = list(self.values)
+        return other
+
+    def __len__(self):
+        return len(self.values)
+
+
+class Cube:
+    """Dense count array over a tuple of vocabularies."""
+
+    def __init__(self, *dims):
+        self.dims = dims
+        self.counts = np.zeros([max(len(d), 1) for d in dims], dtype=np.int64)
+
+    def copy(self, *dims):
+        """This cube's counts over `dims`, the copied vocabularies."""
+
+        other = Cube(*dims)
+        other.counts = self.counts.copy()
+        return other
+
+    def add(self, coords, weight):
+        """Adds `weight` at each coordinate row of the (n, ndims) array `coords`."""
+
+        shape = tuple(max(len(d), 1) for d in self.dims)
+        if shape != self.counts.shape:
+            grown = np.zeros(shape, dtype=np.int64)
+            grown[tuple(slice(0, n) for n in self.counts.shape)] = self.counts
+            self.counts = grown
+        if len(coords):
+            np.add.at(self.counts, tuple(coords.T), weight)
+
+
+class LaunchStats:
+    """Aggregate cubes for the stats page.
+
+    A LaunchStats is never changed once published: refreshed() folds new
+    launches into a copy, so a page reading one sees consistent
+    vocabularies and cubes.
+    """
+
+    def __init__(self):
+        self.providers = Vocabulary()
+        self.months = Vocabulary()
+        self.rockets = Vocabulary()
+        self.outcomes = Vocabulary(OUTCOMES)
+        self.pads = Vocabulary()
+        self.orbits = Vocabulary()
+
+        self.by_provider_month = Cube(self.providers, self.months)
+        self.by_rocket_outcome = Cube(self.rockets, self.outcomes)
+        self.by_pad_orbit = Cube(self.pads, self.orbits)
+
+        # launch id -> its code row, so updates can subtract what they added.
+        self.rows = {}
+        self.max_synced = None
+
+    def copy(self):
+        other = LaunchStats()
+        for name in ('providers', 'months', 'rockets', 'outcomes', 'pads', 'orbits'):
+            setattr(other, name, getattr(self, name).copy())
+        other.by_provider_month = self.by_provider_month.copy(other.providers, other.months)
+        other.by_rocket_outcome = self.by_rocket_outcome.copy(other.rockets, other.outcomes)
+        other.by_pad_orbit = self.by_pad_orbit.copy(other.pads, other.orbits)
+        other.rows = dict(self.rows)
+        other.max_synced = self.max_synced
+        return other
+
+    def _codes(self, launch):
+        return (
+            self.providers.code(launch.organization),
+            self.months.code((launch.launch_date or '')[:7]),
+            self.rockets.code(launch.rocket_name),
+            self.outcomes.code(outcome(launch.status)),
+            self.pads.code(launch.pad_location_name),
+            self.orbits.code(launch.mission_orbit),
+        )
+
+    def _apply(self, codes, weight):
+        codes = np.asarray(codes, dtype=np.int64).reshape(-1, 6)
+        self.by_provider_month.add(codes[:, [0, 1]], weight)
+        self.by_rocket_outcome.add(codes[:, [2, 3]], weight)
+        self.by_pad_orbit.add(codes[:, [4, 5]], weight)
+
+    def refreshed(self):
+        """A copy with the launches written since this one's watermark folded in.
+
+        Returns self when nothing changed.
+        """
+
+        query = Launch.query.with_entities(
+            Launch.id, Launch.synced_at, Launch.launch_date, Launch.status,
+            Launch.organization, Launch.rocket_name, Launch.mission_orbit,
+            Launch.pad_location_name).filter(Launch.synced_since(self.max_synced))
+
+        # Built on a private copy, so a query failing partway publishes nothing.
+        stats = self.copy()
+        old, new = [], []
+        for launch in query.yield_per(5000):
+            if launch.synced_at is not None and (
+                    stats.max_synced is None or launch.synced_at > stats.max_synced):
+                stats.max_synced = launch.synced_at
+
+            codes = stats._codes(launch)
+            # Launches re-read from the overlap window net out to nothing.
+            if stats.rows.get(launch.id) == codes:
+                continue
+            if launch.id in stats.rows:
+                old.append(stats.rows[launch.id])
+            stats.rows[launch.id] = codes
+            new.append(codes)
+
+        if not new and stats.max_synced == self.max_synced:
+            return self
+        stats._apply(old, -1)
+        stats._apply(new, 1)
+        return stats
+
+    def provider_months(self, providers=10, months=12):
+        """(provider names, month labels, counts) for the busiest providers."""
+
+        counts = self.by_provider_month.counts
+        month_order = [i for i in np.argsort(self.months.values)
+                       if self.months.values[i] != UNKNOWN][-months:]
+        counts = counts[:, month_order]
+        top = np.argsort(counts.sum(axis=1))[::-1][:providers]
+        top = top[counts[top].sum(axis=1) > 0]
+        return ([self.providers.values[i] for i in top],
+                [self.months.values[i] for i in month_order],
+                counts[top].tolist())
+
+    def rocket_outcomes(self, rockets=15):
+        """(rocket, launches, successes, failures, success rate) rows, busiest first."""
+
+        counts = self.by_rocket_outcome.counts
+        totals = counts.sum(axis=1)
+        success = counts[:, self.outcomes.codes['Success']]
+        failure = counts[:, self.outcomes.codes['Failure']]
+        decided = success + failure
+        rate = np.divide(success, decided, out=np.zeros(len(totals)), where=decided > 0)
+
+        top = np.argsort(totals)[::-1][:rockets]
+        return [(self.rockets.values[i], int(totals[i]), int(success[i]),
+                 int(failure[i]), float(rate[i]))
+                for i in top if totals[i] > 0]
+
+    def pad_orbits(self, pads=10, orbits=6):
+        """(pad names, orbit names, share of each pad's launches per orbit)."""
+
+        counts = self.by_pad_orbit.counts
+        top_orbits = np.argsort(counts.sum(axis=0))[::-1][:orbits]
+        top_pads = np.argsort(counts.sum(axis=1))[::-1][:pads]
+        top_pads = top_pads[counts[top_pads].sum(axis=1) > 0]
+
+        totals = counts[top_pads].sum(axis=1, keepdims=True)
+        share = counts[np.ix_(top_pads, top_orbits)] / np.maximum(totals, 1)
+        return ([self.pads.values[i] for i in top_pads],
+                [self.orbits.values[i] for i in top_orbits],
+                share.tolist())
+
+
+class LiveStats:
+    """The current LaunchStats, replaced by a refreshed copy when it gets old."""
+
+    def __init__(self, max_age=60):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._refreshed = 0
+        self._stats = LaunchStats()
+
+    def current(self):
+        """The stats, refreshed first if they're older than `max_age` seconds."""
+
+        if time.monotonic() - self._refreshed > self.max_age:
+            with self._lock:
+                if time.monotonic() - self._refreshed > self.max_age:
+                    # One assignment publishes the refreshed stats to readers.
+                    self._stats = self._stats.refreshed()
+                    self._refreshed = time.monotonic()
+        return self._stats
+
+
+launch_stats = LiveStats()
@@ -0,0 +1,143 @@
+"""In-memory prefix index for search-box autocomplete.
+
+Suggestions come from launch names, rocket names, providers and pad
+locations. Every word start of a value is a key ("Falcon 9 Block 5" is found
+by "fal", "9 b" and "block"), stored in one sorted list searched with bisect.
+
+Updates are copy-on-write: a batch of changes builds new sorted lists that
+replace the old ones in a single assignment, so lookups never take a lock.
+"""
+
+import bisect
+import heapq
+import re
+import threading
+
+LAUNCH = 'launch'
+ROCKET = 'rocket'
+PROVIDER = 'provider'
+PAD = 'pad'
+
+# Launch fields indexed, and the suggestion type each one produces.
+FIELD_KINDS = (
+    ('name', LAUNCH),
+    ('rocket_name', ROCKET),
+    ('organization', PROVIDER),
+    ('pad_location_name', PAD),
+)
+
+WORD_START = re.compile(r'(?:^|(?<=[\s|/(\-]))\w', re.UNICODE)
+
+
+def normalize(text):
+    return ' '.join(text.lower().split())
+
+
+def word_keys(text):
+    """Every suffix of `text` that starts at a word boundary."""
+
+    text = normalize(text)
+    return {text[m.start():] for m in WORD_START.finditer(text)}
+
+
+class PrefixIndex:
+    """Sorted (key, kind, label, uuid) entries with reference-counted values.
+
+    Launch names are one entry per launch (with the launch's uuid). Rocket,
+    provider and pad values are shared by many launches and are indexed once,
+    for as long as any launch uses them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = ([], [])
+        self._launches = {}
+        self._refcounts = {}
+
+    def __len__(self):
+        return len(self._data[0])
+
+    def _entries(self, kind, label, uuid=None):
+        return [(key, kind, label, uuid) for key in word_keys(label)]
+
+    def update(self, launches=(), removed=()):
+        """Adds or replaces `launches` (uuid -> field dict) and drops `removed` uuids."""
+
+        with self._lock:
+            added, dropped = [], set()
+
+            def release(uuid):
+                old = self._launches.pop(uuid, None)
+                if old is None:
+                    return
+                for kind, label in old:
+                    if kind == LAUNCH:
+                        dropped.update(self._entries(kind, label, uuid))
+                        continue
+                    self._refcounts[(kind, label)] -= 1
+                    if self._refcounts[(kind, label)] == 0:
+                        del self._refcounts[(kind, label)]
+                        dropped.update(self._entries(kind, label))
+
+            for uuid in removed:
+                release(uuid)
+
+            for uuid, fields in dict(launches).items():
+                release(uuid)
+                values = []
+                for field, kind in FIELD_KINDS:
+                    label = fields.get(field)
+                    if not label:
+                        continue
+                    values.append((kind, label))
+                    if kind == LAUNCH:
+                        added += self._entries(kind, label, uuid)
+                        continue
+                    self._refcounts[(kind, label)] = self._refcounts.get((kind, label), 0) + 1
+                    if self._refcounts[(kind, label)] == 1:
+                        added += self._entries(kind, label)
+                self._launches[uuid] = values
+
+            # A value released and re-added in the same batch nets out.
+            readded = dropped.intersection(added)
+            dropped -= readded
+            added = [entry for entry in added if entry not in readded]
+
+            _, items = self._data
+            if dropped:
+                items = [entry for entry in items if entry not in dropped]
+            if added:
+                items = list(heapq.merge(items, sorted(added, key=_sort_key), key=_sort_key))
+            self._data = ([entry[0] for entry in items], items)
+
+    def replace(self, launches):
+        """Rebuilds the index from scratch from `launches` (uuid -> field dict)."""
+
+        fresh = PrefixIndex()
+        fresh.update(launches)
+        with self._lock:
+            self._launches, self._refcounts = fresh._launches, fresh._refcounts
+            self._data = fresh._data
+
+    def lookup(self, prefix, limit=10):
+        """Up to `limit` distinct suggestions whose words start with `prefix`."""
+
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        keys, items = self._data
+        seen = set()
+        results = []
+        i = bisect.bisect_left(keys, prefix)
+        while i < len(keys) and keys[i].startswith(prefix) and len(results) < limit:
+            _, kind, label, uuid = items[i]
+            if (kind, label, uuid) not in seen:
+                seen.add((kind, label, uuid))
+                results.append({'type': kind, 'label': label, 'uuid': uuid})
+            i += 1
+        return results
+
+
+def _sort_key(entry):
+    return entry[0], entry[1], entry[2], entry[3] or ''
@@ -0,0 +1,222 @@
+"""Rate-limit-aware gateway for Launch Library 2 requests.
+
+Every call to the upstream API goes through a single UpstreamGateway so that:
+    - identical concurrent requests are coalesced into one in-flight call,
+    - calls are spent from a token bucket sized to the API quota,
+    - interactive (page) requests jump ahead of background prefetch/sync work,
+    - empty results and 404s are remembered briefly instead of re-fetched.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+
+import requests
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+class UpstreamBusy(requests.RequestException):
+    """Raised when an interactive request can't get a token in time."""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        """Seconds until a token is available (0 if one is available now)."""
+
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def pause(self, seconds):
+        """Drain the bucket and stop issuing tokens, e.g. after a 429."""
+
+        self.tokens = 0
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, ttl, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is None or item[0] < time.monotonic():
+                return None
+            self._data[key] = item
+            return item[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            while len(self._data) > self.maxsize:
+                del self._data[next(iter(self._data))]
+
+
+class _Call:
+    """A single in-flight upstream request shared by all of its waiters."""
+
+    def __init__(self, priority):
+        self.priority = priority
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class UpstreamGateway:
+    """Single-flight, prioritized, rate-limited JSON fetcher."""
+
+    def __init__(self, rate, burst, negative_ttl=60, max_wait=10, timeout=10, negative_size=4096):
+        self.bucket = TokenBucket(rate, burst)
+        self.negative_ttl = negative_ttl
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.http = requests.Session()
+
+        self._lock = threading.Lock()
+        self._turn = threading.Condition(self._lock)
+        self._queue = []
+        self._seq = itertools.count()
+        self._inflight = {}
+        # Keys are user-typed searches too, so this has to be bounded.
+        self._negative = TTLCache(ttl=negative_ttl, maxsize=negative_size)
+
+    @staticmethod
+    def _key(url, params):
+        return url, tuple(sorted((params or {}).items()))
+
+    def get(self, url, params=None, priority=INTERACTIVE):
+        """GET `url` and return its JSON body.
+
+        Returns None for negative results (404 or an empty result list).
+        """
+
+        key = self._key(url, params)
+
+        with self._lock:
+            if self._negative.get(key):
+                return None
+
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call(priority)
+            elif priority < call.priority:
+                # An interactive caller joined a background fetch: promote it.
+                call.priority = priority
+                self._turn.notify_all()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._fetch(url, params, call)
+            if call.result is None:
+                self._negative.set(key, True)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call.done.set()
+
+        return call.result
+
+    def _fetch(self, url, params, call):
+        for attempt in range(3):
+            self._acquire(call)
+            res = self.http.get(url, params=params, timeout=self.timeout)
+
+            if res.status_code == 429:
+                retry_after = res.headers.get('Retry-After', '')
+                with self._lock:
+                    self.bucket.pause(int(retry_after) if retry_after.isdigit() else 60)
+                continue
+            if res.status_code == 404:
+                return None
+
+            res.raise_for_status()
+            data = res.json()
+            if data.get('count') == 0:
+                return None
+            return data
+
+        raise UpstreamBusy(f"Upstream kept rate limiting {url}")
+
+    def _acquire(self, call):
+        """Block until this call is first in line and a token is available."""
+
+        deadline = time.monotonic() + self.max_wait
+        with self._lock:
+            entry = [call.priority, next(self._seq), call]
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    if entry[0] != call.priority:
+                        # Priority was bumped while waiting; requeue, and give the
+                        # interactive caller its own max_wait from now.
+                        deadline = time.monotonic() + self.max_wait
+                        entry[2] = None
+                        entry = [call.priority, next(self._seq), call]
+                        heapq.heappush(self._queue, entry)
+
+                    while self._queue and self._queue[0][2] is None:
+                        heapq.heappop(self._queue)
+
+                    wait = self.bucket.wait_time()
+                    if self._queue[0] is entry and wait == 0:
+                        heapq.heappop(self._queue)
+                        self.bucket.take()
+                        self._turn.notify_all()
+                        return
+
+                    if call.priority == INTERACTIVE:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise UpstreamBusy("Launch data is busy, please try again shortly")
+                        wait = min(wait or remaining, remaining)
+                    self._turn.wait(wait or None)
+            except BaseException:
+                entry[2] = None
+                self._turn.notify_all()
+                raise
+
+
+gateway = UpstreamGateway(
+    rate=float(os.environ.get('LL2_REQUESTS_PER_SECOND', 1)),
+    burst=int(os.environ.get('LL2_BURST', 5)),
+    negative_ttl=int(os.environ.get('LL2_NEGATIVE_TTL', 60)))